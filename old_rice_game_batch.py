@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""Batched lockstep simulation of 古米マーケット games with NumPy
+
+BatchEngine advances N games at once. Every per-game value the rules use
+(step count, input position, target index, error timers, consumption
+boost, inventory schedule, ...) is a NumPy array with one entry per game,
+and each step applies the process_input and consume_inventory rules of
+GameCore to all games with array operations.
+
+The engine reproduces GameCore exactly: target sequences are drawn from a
+random.Random per game seeded like GameCore(seed=...), and the inventory
+schedule uses the same floating-point expressions in the same order, so
+the same seeds and keystrokes give bit-identical scores and end reasons.
+check_against_scalar() verifies this on a sample.
+
+NumPy is only needed for this module, not for the game itself:
+
+    pip install -r requirements-batch.txt
+
+    python old_rice_game_batch.py --games 100000 --press-prob 0.07 --check 200
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from old_rice_game_core import GameCore, KEY_OLD, KEY_RICE, END_REASONS, LOOKAHEAD_CHARS, STEP_TIME, \
+    CONSUMPTION_PER_SECOND, uniform_old_count
+
+# Keystroke codes used in key arrays
+NO_KEY = -1
+OLD = 0  # KEY_OLD
+RICE = 1  # KEY_RICE
+
+# Target sequences generated per game at a time
+SEQUENCE_CHUNK = 32
+
+# Initial inventory ring capacity per game (doubled when full)
+QUEUE_CAPACITY = 16
+
+# Simulated seconds after which run_bots stops unfinished games
+MAX_GAME_TIME = 600.0
+
+# Per-lane arrays, dropped for finished games by BatchEngine.compact
+LANE_ARRAYS = ("ids", "counts", "playing", "step_count", "target_index", "input_pos", "error_flash",
+               "error_penalty", "error_count", "consumption_boost", "queue", "head", "length",
+               "front_length", "scale", "now", "front_start", "front_remaining", "queued_work")
+
+
+class BatchEngine:
+    """Struct-of-arrays state for N games advanced in lockstep
+
+    Games start as if GameCore(seed=seeds[i], ...).start() had been called.
+    step(keys) applies one keystroke per lane (NO_KEY, OLD or RICE) before
+    stepping, like a key pressed between two frames. Lanes are games until
+    compact() drops the finished ones; ids maps lanes back to games, and
+    score / end_reason are always indexed by game.
+    """
+
+    def __init__(self, seeds, consumption_constant=0.5, error_penalty_time=3.0, max_errors=3,
+                 error_boost=1.0, distribution=uniform_old_count):
+        self.n = n = len(seeds)  # Lanes
+        self.consumption_constant = consumption_constant
+        self.error_penalty_time = error_penalty_time
+        self.max_errors = max_errors
+        self.error_boost = error_boost
+        self.distribution = distribution
+        self.rows = np.arange(n)
+        self.ids = np.arange(n)  # Lane -> game index
+
+        # Target sequences: number of 「古」 in each, drawn lazily per game
+        self.rngs = [random.Random(seed) for seed in seeds]
+        for rng in self.rngs:
+            # GameCore fills its lookahead window once when constructed and
+            # again in start(); the targets are the draws after the first fill
+            chars = 0
+            while chars < LOOKAHEAD_CHARS:
+                chars += distribution(rng) + 1
+        self.counts = np.zeros((n, 0), dtype=np.int8)
+        self.extend_sequences(np.ones(n, dtype=bool))
+
+        # Results, per game
+        self.end_reason = np.full(n, -1, dtype=np.int8)  # Index in END_REASONS
+        self.score = np.zeros(n)
+
+        # Game progress
+        self.playing = np.ones(n, dtype=bool)
+        self.step_count = np.zeros(n, dtype=np.int64)
+        self.target_index = np.zeros(n, dtype=np.int64)
+        self.input_pos = np.zeros(n, dtype=np.int64)  # len(current_sequence)
+        self.error_flash = np.zeros(n)
+        self.error_penalty = np.zeros(n)
+        self.error_count = np.zeros(n, dtype=np.int64)
+        self.consumption_boost = np.ones(n)
+
+        # Inventory schedule (see InventorySchedule): item lengths in a ring
+        # per game; every item's amount equals its length
+        self.queue = np.zeros((n, QUEUE_CAPACITY), dtype=np.int16)
+        self.head = np.zeros(n, dtype=np.int64)
+        self.length = np.ones(n, dtype=np.int64)
+        self.queue[:, 0] = 2  # The initial 「古米」
+        self.front_length = np.full(n, 2, dtype=np.int64)  # Length (and amount) of the front item
+        self.scale = np.full(n, CONSUMPTION_PER_SECOND / consumption_constant)
+        self.now = np.zeros(n)
+        self.front_start = np.zeros(n)
+        self.front_remaining = np.full(n, 2.0)
+        self.queued_work = np.zeros(n)
+
+    def extend_sequences(self, mask):
+        """Draw SEQUENCE_CHUNK more targets for the games in mask"""
+        chunk = np.zeros((self.n, SEQUENCE_CHUNK), dtype=np.int8)
+        for i in np.flatnonzero(mask):
+            rng = self.rngs[i]
+            chunk[i] = [self.distribution(rng) for _ in range(SEQUENCE_CHUNK)]
+        self.counts = np.concatenate([self.counts, chunk], axis=1)
+
+    def front_depletion_time(self):
+        return self.front_start + self.front_remaining * self.front_length / self.scale
+
+    def expected_keys(self):
+        """The correct next key of every game"""
+        k = self.counts[self.rows, self.target_index]
+        return np.where(self.input_pos < k, OLD, RICE).astype(np.int8)
+
+    def process_input(self, keys):
+        """Apply one keystroke per game (NO_KEY for none)"""
+        act = self.playing & (keys >= 0) & ~(self.error_penalty > 0)
+        if not act.any():
+            return
+        k = self.counts[self.rows, self.target_index].astype(np.int64)
+        correct = act & ((keys == OLD) == (self.input_pos < k))
+        self.register_error(act & ~correct)
+
+        self.input_pos[correct] += 1
+        self.complete_sequence(correct & (self.input_pos == k + 1))
+
+    def register_error(self, mask):
+        """Apply the wrong-key penalty to the games in mask"""
+        if not mask.any():
+            return
+        self.error_flash[mask] = self.error_penalty_time
+        self.error_penalty[mask] = self.error_penalty_time
+        self.consumption_boost[mask] += self.error_boost
+
+        # InventorySchedule.set_scale: re-anchor the front item at now
+        anchored = mask & (self.length > 0)
+        length = self.front_length[anchored]
+        remaining = (self.front_remaining[anchored]
+                     - (self.now[anchored] - self.front_start[anchored]) * self.scale[anchored] / length)
+        self.front_remaining[anchored] = np.minimum(length, np.maximum(0.0, remaining))
+        self.front_start[anchored] = self.now[anchored]
+        self.scale[mask] = CONSUMPTION_PER_SECOND * self.consumption_boost[mask] / self.consumption_constant
+
+        self.error_count[mask] += 1
+        self.end(mask & (self.error_count >= self.max_errors), "errors")
+
+    def complete_sequence(self, mask):
+        """Queue the completed sequences and move to the next targets"""
+        if not mask.any():
+            return
+        amount = self.counts[mask, self.target_index[mask]].astype(np.int64) + 1
+
+        empty = self.length[mask] == 0
+        rows = np.flatnonzero(mask)
+        self.front_start[rows[empty]] = self.now[rows[empty]]
+        self.front_remaining[rows[empty]] = amount[empty]
+        self.front_length[rows[empty]] = amount[empty]
+        self.queued_work[rows[~empty]] += amount[~empty] * amount[~empty]
+
+        if (self.length[mask] == self.queue.shape[1]).any():
+            self.grow_queue()
+        capacity = self.queue.shape[1]
+        self.queue[rows, (self.head[rows] + self.length[rows]) % capacity] = amount
+        self.length[mask] += 1
+
+        self.target_index[mask] += 1
+        self.input_pos[mask] = 0
+        if (self.target_index[mask] >= self.counts.shape[1]).any():
+            self.extend_sequences(self.playing)
+
+    def grow_queue(self):
+        """Double the inventory ring capacity, unwrapping every ring"""
+        capacity = self.queue.shape[1]
+        order = (self.head[:, None] + np.arange(capacity)) % capacity
+        grown = np.zeros((self.n, capacity * 2), dtype=self.queue.dtype)
+        grown[:, :capacity] = self.queue[self.rows[:, None], order]
+        self.queue = grown
+        self.head[:] = 0
+
+    def end(self, mask, reason):
+        """End the games in mask with the given END_REASONS reason"""
+        self.playing[mask] = False
+        self.score[self.ids[mask]] = self.step_count[mask] * STEP_TIME
+        self.end_reason[self.ids[mask]] = END_REASONS.index(reason)
+
+    def compact(self):
+        """Drop the lanes of finished games so steps only touch running ones"""
+        keep = np.flatnonzero(self.playing)
+        for name in LANE_ARRAYS:
+            setattr(self, name, getattr(self, name)[keep])
+        self.rngs = [self.rngs[i] for i in keep]
+        self.n = len(keep)
+        self.rows = np.arange(self.n)
+
+    def step(self, keys=None):
+        """Apply keys (if any), then advance every running game one step"""
+        if keys is not None:
+            self.process_input(keys)
+
+        playing = self.playing
+        self.step_count[playing] += 1
+        elapsed = self.step_count * STEP_TIME
+        self.now[playing] = elapsed[playing]
+
+        # InventorySchedule.advance: drop every item that ran out by now
+        while True:
+            depleted = playing & (self.length > 0) & (self.front_depletion_time() <= self.now)
+            if not depleted.any():
+                break
+            self.front_start[depleted] = self.front_depletion_time()[depleted]
+            self.head[depleted] += 1
+            self.length[depleted] -= 1
+            refill = depleted & (self.length > 0)
+            rows = np.flatnonzero(refill)
+            length = self.queue[rows, self.head[rows] % self.queue.shape[1]].astype(np.int64)
+            self.front_length[rows] = length
+            self.front_remaining[rows] = length
+            self.queued_work[refill] -= length * length
+        self.queued_work[playing & (self.length == 0)] = 0.0
+
+        self.end(playing & (self.length == 0), "stockout")
+        playing = self.playing
+
+        # Error flash and penalty countdown (the penalty only counts during the flash)
+        flashing = playing & (self.error_flash > 0)
+        self.error_flash[flashing] = np.maximum(0.0, self.error_flash[flashing] - STEP_TIME)
+        penalised = flashing & (self.error_penalty > 0)
+        self.error_penalty[penalised] = np.maximum(0.0, self.error_penalty[penalised] - STEP_TIME)
+        self.input_pos[penalised & (self.error_penalty == 0)] = 0
+
+    def run_bots(self, press_prob, error_prob, seed=0, max_time=MAX_GAME_TIME):
+        """Play every game with a per-step Bernoulli typist until all end
+
+        Each step a game presses a key with probability press_prob; the key
+        is wrong with probability error_prob. Games still running after
+        max_time are ended as "quit".
+        """
+        rng = np.random.default_rng(seed)
+        max_steps = int(max_time / STEP_TIME)
+        steps = 0
+        while self.n and steps < max_steps:
+            self.step(self.bot_keys(rng, press_prob, error_prob))
+            steps += 1
+            if steps % 60 == 0 and np.count_nonzero(self.playing) < self.n // 2:
+                self.compact()
+            elif not self.playing.any():
+                break
+        self.end(self.playing.copy(), "quit")
+
+    def bot_keys(self, rng, press_prob, error_prob):
+        """One step of keystrokes from the Bernoulli typist"""
+        press = rng.random(self.n) < press_prob
+        wrong = rng.random(self.n) < error_prob
+        keys = self.expected_keys() ^ wrong.astype(np.int8)
+        return np.where(press, keys, NO_KEY).astype(np.int8)
+
+
+def check_against_scalar(engine_args, seeds, press_prob, error_prob, seed=0, max_time=60.0):
+    """Run the same games through BatchEngine and GameCore; returns mismatching seeds"""
+    engine = BatchEngine(seeds, **engine_args)
+    cores = [GameCore(seed=s, **engine_args) for s in seeds]
+    for core in cores:
+        core.start()
+
+    rng = np.random.default_rng(seed)
+    for _ in range(int(max_time / STEP_TIME)):
+        if not engine.playing.any():
+            break
+        keys = engine.bot_keys(rng, press_prob, error_prob)
+        for core, key in zip(cores, keys):
+            if key != NO_KEY and core.game_state == "playing":
+                core.process_input(KEY_OLD if key == OLD else KEY_RICE)
+            core.step()
+        engine.step(keys)
+
+    mismatches = []
+    for i, core in enumerate(cores):
+        if engine.playing[i] != (core.game_state == "playing"):
+            mismatches.append(seeds[i])
+        elif not engine.playing[i] and (engine.score[i] != core.score
+                                        or END_REASONS[engine.end_reason[i]] != core.end_reason):
+            mismatches.append(seeds[i])
+    return mismatches
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo survival of 古米マーケット games with NumPy")
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--press-prob", type=float, default=0.07, help="chance of a keystroke per step")
+    parser.add_argument("--error-prob", type=float, default=0.02, help="chance a keystroke is wrong")
+    parser.add_argument("--consumption-constant", type=float, default=0.5)
+    parser.add_argument("--error-penalty-time", type=float, default=3.0)
+    parser.add_argument("--max-errors", type=int, default=3)
+    parser.add_argument("--error-boost", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", type=int, default=0, metavar="N",
+                        help="first compare N games against GameCore")
+    args = parser.parse_args(argv)
+
+    engine_args = {
+        "consumption_constant": args.consumption_constant,
+        "error_penalty_time": args.error_penalty_time,
+        "max_errors": args.max_errors,
+        "error_boost": args.error_boost,
+    }
+    if args.check:
+        mismatches = check_against_scalar(engine_args, list(range(args.check)), args.press_prob,
+                                          args.error_prob, args.seed)
+        if mismatches:
+            print(f"scalar mismatch for seeds {mismatches[:10]}", file=sys.stderr)
+            return 1
+
+    start = time.perf_counter()
+    engine = BatchEngine(range(args.seed, args.seed + args.games), **engine_args)
+    engine.run_bots(args.press_prob, args.error_prob, args.seed)
+    elapsed = time.perf_counter() - start
+
+    survival = np.sort(engine.score)
+    print(json.dumps({
+        "games": args.games,
+        "seconds": elapsed,
+        "survival": {f"p{p}": float(np.percentile(survival, p)) for p in (10, 25, 50, 75, 90, 99)},
+        "mean_survival": float(survival.mean()),
+        "end_reasons": {reason: int((engine.end_reason == i).sum()) for i, reason in enumerate(END_REASONS)},
+    }, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
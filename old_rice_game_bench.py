@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""Benchmarks for the render and logic hot paths of 古米マーケット
+
+Runs headlessly under SDL's dummy video driver and prints the results as
+JSON. Each benchmark reports the best of several repeats, in operations per
+second (higher is better) or milliseconds per frame (lower is better).
+
+    python old_rice_game_bench.py --output bench.json
+    python old_rice_game_bench.py --baseline bench.json --threshold 0.1
+
+With --baseline, any benchmark more than `threshold` worse than the stored
+value is reported and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+# Must be set before pygame is initialised (OldRiceGame does it)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from old_rice_game_core import GameCore, SimulatedClock, STEP_TIME  # noqa: E402
+from old_rice_game_pygame import OldRiceGame, BLACK  # noqa: E402
+
+# Inventory depths for the render and consumption benchmarks
+INVENTORY_DEPTHS = (1, 10, 100, 1000, 10000)
+
+# Display backends benchmarked, with the prefix of their result names
+BACKEND_PREFIXES = (("surface", ""), ("renderer", "renderer."))
+
+# Repeats per benchmark; the best one is reported
+REPEATS = 5
+
+# Default allowed slowdown against the baseline (10%)
+REGRESSION_THRESHOLD = 0.10
+
+
+def best_time(fn, iterations, repeats=REPEATS):
+    """Best wall time in seconds of `iterations` calls to fn"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def rate(fn, iterations):
+    """Result entry in operations per second"""
+    return {"value": iterations / best_time(fn, iterations), "unit": "ops/s", "higher_is_better": True}
+
+
+def frame_time(fn, iterations):
+    """Result entry in milliseconds per call"""
+    return {"value": best_time(fn, iterations) / iterations * 1000, "unit": "ms", "higher_is_better": False}
+
+
+def fill_inventory(core, depth):
+    """Start a game and queue `depth` long-lasting sets"""
+    core.start()
+    core.inventory.clear()
+    for _ in range(depth):
+        core.inventory.append(("古古古古古米", 6))
+
+
+def type_key(core):
+    """Type the next expected key"""
+    core.process_input(core.expected_key())
+
+
+def bench_update_game_display(game, results, prefix=""):
+    """Gameplay screen redraw at increasing inventory depths"""
+    for mode in ("dirty", "full"):
+        game.render_mode = mode
+        for depth in INVENTORY_DEPTHS:
+            fill_inventory(game.core, depth)
+            game.invalidate_display()
+            frame = [0]
+
+            def redraw():
+                # Advance the game a step like a real frame, so the timer and
+                # the front item's progress bar actually change
+                game.core.step()
+                if game.core.game_state != "playing":
+                    fill_inventory(game.core, depth)
+                    game.invalidate_display()
+                frame[0] += 1
+                game.alpha = (frame[0] % 10) / 10
+                game.update_game_display()
+            results[f"{prefix}update_game_display.{mode}.depth_{depth}"] = rate(redraw, 200)
+
+
+def bench_draw_text(game, results, prefix=""):
+    """draw_text with cached and volatile, short and long strings"""
+    short_text = "古米"
+    long_text = "古古古米古米古古古古米" * 8
+    for name, text in (("short", short_text), ("long", long_text)):
+        for volatile in (False, True):
+            kind = "volatile" if volatile else "cached"
+            results[f"{prefix}draw_text.{name}.{kind}"] = rate(
+                lambda: game.draw_text(text, game.medium_font, BLACK, 20, 20, volatile=volatile), 2000)
+
+
+def bench_process_input(results):
+    """Correct keystrokes through GameCore.process_input"""
+    core = GameCore(seed=0, clock=SimulatedClock())
+    core.start()
+    results["process_input"] = rate(lambda: type_key(core), 50000)
+
+
+def bench_consume_inventory(results):
+    """One step of inventory consumption at increasing depths"""
+    for depth in INVENTORY_DEPTHS:
+        core = GameCore(seed=0, clock=SimulatedClock())
+        fill_inventory(core, depth)
+
+        def consume():
+            core.elapsed_time += STEP_TIME
+            core.consume_inventory()
+        results[f"consume_inventory.depth_{depth}"] = rate(consume, 20000)
+
+
+def bench_full_loop(game, results, prefix=""):
+    """Whole loop body (events, update, draw) per game state, without the frame cap
+
+    The intro and game over screens are drawn from scratch every frame
+    (what the loop did before idle mode), and also timed when only the
+    cached screen is pushed again (what an expose event costs).
+    """
+    clock = SimulatedClock()
+    game.core.clock = clock
+    game.render_mode = "dirty"
+
+    def static_frame(show, cached):
+        def frame():
+            pygame.event.get()
+            if not cached:
+                game.static_screens.clear()
+            game.shown_screen = None
+            show()
+        return frame
+
+    def playing_frame():
+        pygame.event.get()
+        clock.advance(STEP_TIME)
+        game.alpha = game.core.update()
+        game.update_game_display()
+        if game.core.game_state != "playing":
+            fill_inventory(game.core, 5)
+            game.invalidate_display()
+
+    game.core.game_state = "intro"
+    results[f"{prefix}full_loop.intro"] = frame_time(static_frame(game.show_intro, False), 200)
+    results[f"{prefix}full_loop.intro.cached"] = frame_time(static_frame(game.show_intro, True), 200)
+    fill_inventory(game.core, 5)
+    game.invalidate_display()
+    results[f"{prefix}full_loop.playing"] = frame_time(playing_frame, 600)
+    game.core.end("quit")
+    results[f"{prefix}full_loop.game_over"] = frame_time(static_frame(game.show_game_over, False), 200)
+    results[f"{prefix}full_loop.game_over.cached"] = frame_time(static_frame(game.show_game_over, True), 200)
+
+
+def run_benchmarks():
+    """Run every benchmark and return the JSON-ready report"""
+    results = {}
+    text_cache = {}  # Backend -> text cache counters after its benchmarks
+    bench_process_input(results)
+    bench_consume_inventory(results)
+
+    # Display backends; the renderer uses SDL's software renderer so the
+    # numbers don't depend on a GPU
+    for backend, prefix in BACKEND_PREFIXES:
+        game = OldRiceGame(seed=0, keep_scores=False, backend=backend, software_renderer=True)
+        bench_update_game_display(game, results, prefix)
+        bench_draw_text(game, results, prefix)
+        bench_full_loop(game, results, prefix)
+        text_cache[backend] = game.text_cache.stats()
+        pygame.quit()
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "video_driver": os.environ["SDL_VIDEODRIVER"],
+        },
+        "benchmarks": results,
+        "text_cache": text_cache,
+    }
+
+
+def compare(report, baseline, threshold=REGRESSION_THRESHOLD):
+    """Return (name, baseline, current, change) for every regression beyond threshold"""
+    regressions = []
+    for name, current in report["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None:
+            continue
+        if current["higher_is_better"]:
+            change = previous["value"] / current["value"] - 1
+        else:
+            change = current["value"] / previous["value"] - 1
+        if change > threshold:
+            regressions.append((name, previous["value"], current["value"], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark 古米マーケット headlessly")
+    parser.add_argument("--output", metavar="PATH", default=None, help="also write the report to PATH")
+    parser.add_argument("--baseline", metavar="PATH", default=None, help="compare against a stored report")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed slowdown against the baseline (fraction, default 0.1)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks()
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, previous, current, change in regressions:
+            print(f"REGRESSION {name}: {previous:.4g} -> {current:.4g} ({change:+.1%} worse)", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
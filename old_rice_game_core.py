@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""Headless game rules for 古米マーケット (Old Rice Market)
+
+GameCore holds the whole game state and rules with no pygame dependency, so
+many games can be simulated without a display. Randomness comes from a
+seedable RNG and time from an injectable clock.
+
+The rules advance in fixed simulation steps of STEP_TIME seconds. update()
+feeds real elapsed time from the clock into an accumulator and runs as many
+steps as fit (capped by max_steps_per_update), so game speed does not depend
+on the frame rate. All timers are in seconds of simulated time.
+"""
+import random
+import time
+from collections import deque
+
+# Fixed simulation step (seconds)
+STEP_TIME = 1 / 60
+
+# Base consumption rate (units per second, before the set length, the
+# consumption constant and the boost): the original 0.016 per frame at 60 fps
+CONSUMPTION_PER_SECOND = 0.016 * 60
+
+# Maximum simulation steps run by a single update() before time is dropped
+MAX_STEPS_PER_UPDATE = 8
+
+# Minimum number of characters kept in the target lookahead window
+LOOKAHEAD_CHARS = 20
+
+# Abstract keys understood by GameCore.process_input
+KEY_OLD = "f"  # Types 「古」
+KEY_RICE = "j"  # Types 「米」
+
+# Why a game ended (GameCore.end_reason)
+END_REASONS = ("stockout", "errors", "quit")
+
+
+class SimulatedClock:
+    """Manually advanced clock for headless simulation"""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        """Move the clock forward"""
+        self.now += seconds
+
+
+def expected_key(target, typed):
+    """The key that types the next character of `target` after `typed`
+
+    Once the target is complete (or empty) any key is an error; KEY_OLD is
+    returned so bots still make progress through the penalty.
+    """
+    return KEY_RICE if len(typed) < len(target) and target[len(typed)] == "米" else KEY_OLD
+
+
+def uniform_old_count(rng):
+    """Default distribution: 1-5 「古」 per sequence, uniformly"""
+    return rng.randint(1, 5)
+
+
+def weighted_old_count(weights):
+    """Distribution picking n+1 「古」 with relative probability weights[n]"""
+    counts = range(1, len(weights) + 1)
+
+    def distribution(rng):
+        return rng.choices(counts, weights)[0]
+    return distribution
+
+
+class SequenceStream:
+    """Bounded, lazily generated stream of target sequences
+
+    Only the sequences needed to fill a lookahead window of at least
+    `lookahead` characters are kept, so memory stays flat however many
+    sequences are completed. `distribution(rng)` returns how many 「古」 the
+    next sequence has.
+    """
+
+    def __init__(self, rng, distribution=uniform_old_count, lookahead=LOOKAHEAD_CHARS):
+        self.rng = rng
+        self.distribution = distribution
+        self.lookahead = lookahead
+        self.pending = deque()  # Sequences in the lookahead window, current first
+        self.pending_chars = 0  # Total length of the pending sequences
+        self.generated = 0  # Sequences generated since the last reset
+        self.window = ""  # Pending sequences joined, for rendering
+        self.fill()
+
+    def reset(self):
+        """Drop the window and start a fresh stream"""
+        self.pending.clear()
+        self.pending_chars = 0
+        self.generated = 0
+        self.fill()
+
+    def fill(self):
+        """Generate sequences until the window holds `lookahead` characters"""
+        while self.pending_chars < self.lookahead:
+            sequence = "古" * self.distribution(self.rng) + "米"
+            self.pending.append(sequence)
+            self.pending_chars += len(sequence)
+            self.generated += 1
+        self.window = "".join(self.pending)
+
+    @property
+    def current(self):
+        """The sequence being typed"""
+        return self.pending[0]
+
+    def advance(self):
+        """Drop the current sequence and return the next one"""
+        self.pending_chars -= len(self.pending.popleft())
+        self.fill()
+        return self.pending[0]
+
+
+class InventorySchedule:
+    """FIFO inventory depleted on a closed-form schedule
+
+    Items are (rice_set, amount) and are consumed one at a time. An item of
+    length n drains at `scale / n` units per second, so only the front item's
+    anchor (the time it had `front_remaining` left) is stored; depletion times
+    and the time until the queue is empty follow analytically and remaining
+    amounts are computed when read. Changing the scale re-anchors the front
+    item, rescaling the rest of the schedule.
+    """
+
+    def __init__(self, scale):
+        self.scale = scale  # CONSUMPTION_PER_SECOND * consumption_boost / consumption_constant
+        self.items = deque()  # (rice_set, amount), front item first
+        self.now = 0.0  # Time the schedule was last advanced to
+        self.front_start = 0.0  # Time at which the front item had front_remaining left
+        self.front_remaining = 0.0
+        self.queued_work = 0.0  # Sum of amount * len(rice_set) behind the front item
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        """Yield (rice_set, remaining) for every item at the current time"""
+        for i, (rice_set, amount) in enumerate(self.items):
+            if i == 0:
+                yield rice_set, self.remaining_at(self.now)
+            else:
+                yield rice_set, amount
+
+    def __getitem__(self, index):
+        if index == 0 and self.items:
+            return self.items[0][0], self.remaining_at(self.now)
+        return self.items[index]
+
+    def clear(self, now=0.0):
+        """Empty the inventory and restart its clock at `now`"""
+        self.items.clear()
+        self.now = now
+        self.queued_work = 0.0
+
+    def append(self, item):
+        """Queue a (rice_set, amount) item"""
+        rice_set, amount = item
+        if not self.items:
+            self.front_start = self.now
+            self.front_remaining = amount
+        else:
+            self.queued_work += amount * len(rice_set)
+        self.items.append(item)
+
+    def remaining_at(self, t):
+        """Front item's remaining amount at time `t`"""
+        rice_set, amount = self.items[0]
+        remaining = self.front_remaining - (t - self.front_start) * self.scale / len(rice_set)
+        return min(amount, max(0.0, remaining))
+
+    def front_depletion_time(self):
+        """Time at which the front item runs out"""
+        rice_set = self.items[0][0]
+        return self.front_start + self.front_remaining * len(rice_set) / self.scale
+
+    def depletion_times(self):
+        """Yield the time each item runs out, front first"""
+        t = self.front_depletion_time()
+        for i, (rice_set, amount) in enumerate(self.items):
+            if i > 0:
+                t += amount * len(rice_set) / self.scale
+            yield t
+
+    def time_to_empty(self, t):
+        """Seconds from `t` until the whole queue is consumed"""
+        if not self.items:
+            return 0.0
+        return max(0.0, self.front_depletion_time() + self.queued_work / self.scale - t)
+
+    def set_scale(self, scale):
+        """Change the consumption rate from the current time on"""
+        if self.items:
+            self.front_remaining = self.remaining_at(self.now)
+            self.front_start = self.now
+        self.scale = scale
+
+    def advance(self, t):
+        """Move the clock to `t`, dropping items that ran out. Returns True if any did"""
+        self.now = t
+        changed = False
+        while self.items and self.front_depletion_time() <= t:
+            # The next item starts exactly when the previous one ran out
+            self.front_start = self.front_depletion_time()
+            self.items.popleft()
+            changed = True
+            if self.items:
+                rice_set, amount = self.items[0]
+                self.front_remaining = amount
+                self.queued_work -= amount * len(rice_set)
+        if not self.items:
+            self.queued_work = 0.0
+        return changed
+
+
+class GameCore:
+    """Pure state machine for the game rules"""
+
+    def __init__(self, seed=None, clock=time.monotonic, consumption_constant=0.5,
+                 error_penalty_time=3.0, max_errors=3, max_steps_per_update=MAX_STEPS_PER_UPDATE,
+                 distribution=uniform_old_count, recorder=None, error_boost=1.0):
+        if seed is None:
+            # Always know the seed so a session can be replayed
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.recorder = recorder  # Optional replay recorder notified of starts, keys and game overs
+
+        # Fixed-timestep bookkeeping
+        self.max_steps_per_update = max_steps_per_update
+        self.last_update_time = 0  # Clock reading at the previous update()
+        self.accumulator = 0.0  # Real time not yet simulated
+        self.step_count = 0  # Steps simulated in the current game
+        self.dropped_time = 0.0  # Real time discarded by the catch-up cap
+
+        # Game state
+        self.current_sequence = ""
+        self.sequences = SequenceStream(self.rng, distribution)  # Upcoming target sequences
+        self.target_sequence = self.sequences.current
+        self.current_target_index = 0  # Sequences completed in the current game
+        self.inventory = InventorySchedule(CONSUMPTION_PER_SECOND / consumption_constant)  # Store sets of rice
+        self.game_running = False
+        self.game_state = "intro"  # intro, playing, game_over
+        self.elapsed_time = 0  # Simulated seconds since the game started
+        self.consumption_constant = consumption_constant  # Constant for consumption rate
+        self.score = 0
+        self.end_reason = None  # One of END_REASONS once the game is over
+        self.error_flash = 0  # Seconds left of the error flash effect
+        self.error_penalty = 0  # Seconds left of the error penalty
+        self.error_penalty_time = error_penalty_time  # Penalty length in seconds
+        self._consumption_boost = 1.0  # Multiplier for consumption speed (increases on error)
+        self.error_count = 0  # Count of errors made
+        self.max_errors = max_errors  # Maximum allowed errors
+        self.error_boost = error_boost  # Consumption boost added per error
+
+    @property
+    def consumption_boost(self):
+        """Multiplier for consumption speed"""
+        return self._consumption_boost
+
+    @consumption_boost.setter
+    def consumption_boost(self, boost):
+        # Rescale the rest of the inventory schedule from the current time
+        self._consumption_boost = boost
+        self.inventory.set_scale(CONSUMPTION_PER_SECOND * boost / self.consumption_constant)
+
+    @property
+    def full_target_string(self):
+        """The lookahead window of upcoming sequences as one string"""
+        return self.sequences.window
+
+    def generate_target_sequence(self):
+        """Start a fresh stream of target sequences"""
+        self.sequences.reset()
+
+        # Set the current target to the first sequence
+        self.current_target_index = 0
+        self.target_sequence = self.sequences.current
+
+    def start(self):
+        """Start (or restart) a game"""
+        self.game_state = "playing"
+        self.game_running = True
+        self.last_update_time = self.clock()
+        self.accumulator = 0.0
+        self.step_count = 0
+        self.dropped_time = 0.0
+        self.elapsed_time = 0
+        self.end_reason = None
+        self.current_sequence = ""
+        self.inventory.clear()
+        self.consumption_boost = 1.0  # Reset consumption boost
+        self.error_count = 0  # Reset error count
+        self.error_flash = 0  # Reset error flash
+        self.error_penalty = 0  # Reset error penalty
+        self.generate_target_sequence()
+
+        # Add an initial inventory item to prevent immediate game over
+        self.inventory.append(("古米", 2))
+
+        if self.recorder is not None:
+            self.recorder.game_started()
+
+    def end(self, reason="quit"):
+        """End the current game and record the score"""
+        self.game_state = "game_over"
+        self.game_running = False
+        self.score = self.elapsed_time
+        self.end_reason = reason
+
+        if self.recorder is not None:
+            self.recorder.game_ended(self.step_count, reason)
+
+    def update(self):
+        """Simulate the real time passed since the previous update
+
+        Runs whole fixed steps for the time accumulated from the clock, at most
+        max_steps_per_update of them; any backlog beyond that is dropped so a
+        long stall does not freeze the game catching up. Returns the fraction
+        of a step left in the accumulator, for render interpolation.
+        """
+        if self.game_state != "playing":
+            return 0.0
+
+        now = self.clock()
+        self.accumulator += now - self.last_update_time
+        self.last_update_time = now
+
+        steps = 0
+        while self.accumulator >= STEP_TIME and self.game_state == "playing":
+            if steps == self.max_steps_per_update:
+                # Too far behind: give up on the backlog instead of spiralling
+                self.dropped_time += self.accumulator
+                self.accumulator = 0.0
+                break
+            self.step()
+            self.accumulator -= STEP_TIME
+            steps += 1
+
+        return self.accumulator / STEP_TIME
+
+    def step(self):
+        """Advance the running game by one fixed step"""
+        if self.game_state != "playing":
+            return
+
+        self.step_count += 1
+        self.elapsed_time = self.step_count * STEP_TIME
+
+        # Drop the inventory sets that ran out by now
+        self.consume_inventory()
+
+        # Check if game is over - immediately end if inventory is empty
+        if not self.inventory:
+            self.end("stockout")
+            return
+
+        # Count down the error flash and penalty timers
+        self.update_error_timers(STEP_TIME)
+
+    def run_frames(self, frames):
+        """Run up to `frames` fixed steps, stopping early at game over
+
+        Used for headless simulation; no clock is read. Returns the steps run.
+        """
+        stepped = 0
+        while stepped < frames and self.game_state == "playing":
+            self.step()
+            stepped += 1
+        return stepped
+
+    def display_elapsed_time(self, alpha):
+        """Elapsed time interpolated between the last two steps"""
+        return max(0.0, self.elapsed_time - (1.0 - alpha) * STEP_TIME)
+
+    def display_front_remaining(self, alpha):
+        """Front item's remaining amount at the interpolated display time"""
+        return self.inventory.remaining_at(self.display_elapsed_time(alpha))
+
+    def time_until_stockout(self, alpha=1.0):
+        """Seconds until the whole inventory is consumed at the current rate"""
+        return self.inventory.time_to_empty(self.display_elapsed_time(alpha))
+
+    def update_error_timers(self, dt):
+        """Count down the error flash and penalty timers"""
+        if self.error_flash > 0:
+            self.error_flash = max(0.0, self.error_flash - dt)
+
+            if self.error_penalty > 0:
+                self.error_penalty = max(0.0, self.error_penalty - dt)
+
+                # Reset current sequence when penalty ends
+                if self.error_penalty == 0:
+                    self.current_sequence = ""
+
+    def consume_inventory(self):
+        """Advance the inventory schedule to the current simulated time"""
+        return self.inventory.advance(self.elapsed_time)
+
+    def expected_key(self):
+        """The key that correctly types the next character of the target"""
+        return expected_key(self.target_sequence, self.current_sequence)
+
+    def process_input(self, key):
+        """Process a KEY_OLD / KEY_RICE keystroke during gameplay"""
+        if self.recorder is not None and key in (KEY_OLD, KEY_RICE):
+            self.recorder.key_pressed(self.step_count, key)
+
+        # If in penalty period, ignore input
+        if self.error_penalty > 0:
+            return False
+
+        if key == KEY_OLD:
+            expected = "古"
+        elif key == KEY_RICE:
+            expected = "米"
+        else:
+            return False
+
+        # Check if this would be an error
+        if len(self.current_sequence) < len(self.target_sequence) and self.target_sequence[len(self.current_sequence)] == expected:
+            self.current_sequence += expected
+        else:
+            self.register_error()
+            return True
+
+        # Check if the sequence matches the target
+        if self.current_sequence == self.target_sequence:
+            self.complete_sequence()
+
+        return True
+
+    def register_error(self):
+        """Apply the penalty for a wrong key"""
+        self.error_flash = self.error_penalty_time  # Set error flash for entire penalty period
+        self.error_penalty = self.error_penalty_time  # Set penalty timer
+        # Keep the current sequence visible during the error period
+        # It will be reset when the penalty ends
+
+        # Increase consumption speed as penalty (+1.0, doubling, by default)
+        self.consumption_boost += self.error_boost
+
+        # Increment error count
+        self.error_count += 1
+
+        # Check if max errors reached
+        if self.error_count >= self.max_errors:
+            # Game over due to too many errors
+            self.end("errors")
+
+    def complete_sequence(self):
+        """Move a completed sequence into inventory and advance the target"""
+        # Add to inventory
+        self.inventory.append((self.current_sequence, len(self.current_sequence)))
+
+        # Move to next target sequence (the stream refills its window)
+        self.current_target_index += 1
+        self.target_sequence = self.sequences.advance()
+
+        # Reset current sequence
+        self.current_sequence = ""
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""Display backends for 古米マーケット (Old Rice Market)
+
+The game draws through a small interface (blit, blits, fill_rect,
+set_clip, present) implemented twice:
+
+    SurfaceDisplay    the classic software path: everything is blitted onto
+                      the display Surface and pushed with flip/update
+    RendererDisplay   pygame._sdl2.video Renderer: surfaces are uploaded once
+                      as textures and rectangles are renderer primitives
+
+The renderer back buffer is not kept between presents, so frames on that
+backend are always drawn in full (full_frames is True); cached textures
+make that cheap. open_display() picks the renderer when it is available
+and falls back to the Surface path.
+"""
+import weakref
+
+import pygame
+
+try:
+    from pygame._sdl2.video import Renderer, Texture, Window
+except ImportError:  # pygame built without the SDL2 video wrappers
+    Renderer = Texture = Window = None
+
+# Values of the --backend option
+BACKENDS = ("auto", "renderer", "surface")
+
+
+class SurfaceDisplay:
+    """Draws onto the display Surface"""
+
+    name = "surface"
+    full_frames = False  # Unchanged screen areas survive between presents
+
+    def __init__(self, size, caption):
+        self.screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+
+    def new_surface(self, size):
+        """Offscreen surface in the display's pixel format"""
+        return pygame.Surface(size).convert()
+
+    def blit(self, source, dest, area=None):
+        return self.screen.blit(source, dest, area)
+
+    def blits(self, blit_sequence, doreturn=False):
+        return self.screen.blits(blit_sequence, doreturn=doreturn)
+
+    def fill_rect(self, color, rect):
+        pygame.draw.rect(self.screen, color, rect)
+
+    def set_clip(self, rect):
+        self.screen.set_clip(rect)
+
+    def changed(self, surface):
+        """Note that a surface drawn before was redrawn in place"""
+
+    def present(self, rects=None):
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+
+class RendererDisplay:
+    """Draws with an SDL renderer, caching a texture per source surface
+
+    Textures are dropped together with their surfaces (for example when
+    the text cache evicts one), so the cache never outgrows the surfaces
+    the game still holds.
+    """
+
+    name = "renderer"
+    full_frames = True  # The back buffer is undefined after present
+
+    def __init__(self, size, caption, software=False):
+        self.window = Window(caption, size)
+        # accelerated=0 asks for SDL's software renderer, -1 prefers the GPU
+        self.renderer = Renderer(self.window, accelerated=0 if software else -1)
+        self.textures = weakref.WeakKeyDictionary()  # Surface -> Texture
+        self.uploads = 0
+
+    def new_surface(self, size):
+        """Offscreen surface (uploaded as a texture when blitted)"""
+        return pygame.Surface(size)
+
+    def texture(self, surface):
+        """The texture of a surface, uploading it on first use"""
+        texture = self.textures.get(surface)
+        if texture is None:
+            texture = self.textures[surface] = Texture.from_surface(self.renderer, surface)
+            self.uploads += 1
+        return texture
+
+    def blit(self, source, dest, area=None):
+        texture = self.texture(source)
+        if area is None:
+            rect = pygame.Rect(dest[0], dest[1], texture.width, texture.height)
+            texture.draw(None, rect)
+        else:
+            area = pygame.Rect(area)
+            rect = pygame.Rect(dest[0], dest[1], area.width, area.height)
+            texture.draw(area, rect)
+        return rect
+
+    def blits(self, blit_sequence, doreturn=False):
+        texture = self.texture
+        for source, dest in blit_sequence:
+            texture(source).draw(None, dest)
+
+    def fill_rect(self, color, rect):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.fill_rect(pygame.Rect(rect))
+
+    def set_clip(self, rect):
+        """Frames are drawn in full, in region order, so no clipping is needed"""
+
+    def changed(self, surface):
+        """Re-upload a surface that was redrawn in place"""
+        self.textures.pop(surface, None)
+
+    def present(self, rects=None):
+        self.renderer.present()
+
+
+def open_display(backend, size, caption, software_renderer=False):
+    """Open the window with the requested backend ("auto" tries the renderer first)"""
+    if backend in ("auto", "renderer"):
+        if Renderer is not None:
+            try:
+                return RendererDisplay(size, caption, software_renderer)
+            except pygame.error:
+                if backend == "renderer":
+                    raise
+        elif backend == "renderer":
+            raise pygame.error("pygame._sdl2.video is not available")
+    return SurfaceDisplay(size, caption)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Font loading for 古米マーケット (Old Rice Market)
+
+Looking a font up by name makes pygame enumerate every system font, which
+dominates a cold start. The resolved file path is therefore kept in a small
+JSON cache on disk, invalidated when any of the font directories (or a
+subdirectory, where font packages install) changes,
+and each size is only loaded the first time it is used.
+"""
+import json
+import os
+import sys
+import time
+
+import pygame
+
+# CJK font the game is designed for
+FONT_NAME = "notosanscjkjp"
+
+
+def default_cache_path():
+    """Per-user location of the font lookup cache"""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "old_rice_game", "font_cache.json")
+
+
+def font_directories():
+    """System and user font directories whose changes invalidate the cache"""
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        return [os.path.join(os.environ.get("WINDIR", r"C:\Windows"), "Fonts"),
+                os.path.join(os.environ.get("LOCALAPPDATA", home), "Microsoft", "Windows", "Fonts")]
+    if sys.platform == "darwin":
+        return ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    return ["/usr/share/fonts", "/usr/local/share/fonts",
+            os.path.join(home, ".fonts"), os.path.join(home, ".local", "share", "fonts")]
+
+
+def directory_stamps(directories):
+    """Modification time of each existing directory and all its subdirectories
+
+    Like fontconfig, the whole tree is stamped: installing a font into
+    /usr/share/fonts/opentype/noto/ doesn't change /usr/share/fonts itself.
+    """
+    stamps = {}
+    for directory in directories:
+        for root, _, _ in os.walk(directory):
+            try:
+                stamps[root] = os.stat(root).st_mtime_ns
+            except OSError:
+                continue
+    return stamps
+
+
+class FontLoader:
+    """Resolves a font file once and loads its sizes lazily
+
+    stats records whether the path came from the cache and how long the
+    lookup took, for the startup report.
+    """
+
+    def __init__(self, name=FONT_NAME, cache_path=None):
+        self.name = name
+        self.cache_path = cache_path or default_cache_path()
+        self.path = None  # Font file, or None for pygame's default font
+        self.resolved = False
+        self.fonts = {}  # Size -> Font
+        self.stats = {"cache_hit": False, "resolve_seconds": 0.0}
+
+    def resolve(self):
+        """Return the font file path, from the cache when it is still valid"""
+        if self.resolved:
+            return self.path
+
+        start = time.perf_counter()
+        cached = self.load_cache() or {}
+        roots = font_directories() + cached.get("extra_roots", [])
+        stamps = directory_stamps(roots)
+        if (cached.get("name") == self.name and cached.get("stamps") == stamps
+                and (cached.get("path") is None or os.path.exists(cached["path"]))):
+            self.path = cached.get("path")
+            self.stats["cache_hit"] = True
+        else:
+            # Slow path: enumerate the system fonts
+            self.path = pygame.font.match_font(self.name)
+            extra_roots = []
+            if self.path and os.path.dirname(self.path) not in stamps:
+                # The font's own directory may not be under a standard one
+                extra_roots.append(os.path.dirname(self.path))
+                stamps.update(directory_stamps(extra_roots))
+            self.save_cache({"name": self.name, "path": self.path, "stamps": stamps, "extra_roots": extra_roots})
+        self.resolved = True
+        self.stats["resolve_seconds"] = time.perf_counter() - start
+        return self.path
+
+    def load_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_cache(self, data):
+        # A read-only cache location only costs the slow lookup next time
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        except OSError:
+            pass
+
+    def get(self, size):
+        """Font of the given size, loaded on first use"""
+        font = self.fonts.get(size)
+        if font is None:
+            font = pygame.font.Font(self.resolve(), size)
+            self.fonts[size] = font
+        return font
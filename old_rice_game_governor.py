@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Adaptive frame-budget governor for 古米マーケット (Old Rice Market)
+
+The main loop reports how long each gameplay frame took to process (not
+counting the frame-cap sleep). While the smoothed frame time stays over
+budget, the governor steps up one level, dropping the next piece of
+non-essential drawing in DEGRADATIONS order; once there is headroom again
+it steps back down, restoring detail. Levels change at most once every
+COOLDOWN_FRAMES frames, so a single slow frame doesn't flip the display
+back and forth.
+
+Only rendering is ever reduced: input handling and the fixed-timestep
+game rules run the same at every level.
+"""
+
+# Non-essential work, dropped in this order (level n drops the first n)
+DEGRADATIONS = (
+    "hint",            # Faded next-character hint on the input line
+    "timer_rate",      # Timers and countdowns refresh at a lower rate
+    "inventory_rows",  # Fewer queued inventory rows
+    "target_strip",    # Lookahead part of the target strip is shortened
+)
+
+# Frame processing budget (seconds) at 60 fps
+FRAME_BUDGET = 1 / 60
+
+# Weight of the newest frame in the smoothed frame time
+SMOOTHING = 0.1
+
+# Detail is restored once the smoothed frame time is under this fraction of the budget
+RESTORE_FRACTION = 0.6
+
+# Minimum frames between two level changes
+COOLDOWN_FRAMES = 30
+
+# Frames between timer refreshes at the timer_rate level (6 per second)
+TIMER_DIVISOR = 10
+
+# Queued inventory rows kept at the inventory_rows level
+REDUCED_INVENTORY_ROWS = 3
+
+# Lookahead characters kept after the current target at the target_strip level
+REDUCED_LOOKAHEAD = 5
+
+
+class FrameGovernor:
+    """Tracks frame times against a budget and picks a detail level"""
+
+    def __init__(self, budget=FRAME_BUDGET, smoothing=SMOOTHING, restore_fraction=RESTORE_FRACTION,
+                 cooldown=COOLDOWN_FRAMES):
+        self.budget = budget
+        self.smoothing = smoothing
+        self.restore_fraction = restore_fraction
+        self.cooldown = cooldown
+        self.level = 0  # Number of DEGRADATIONS in effect
+        self.smoothed = 0.0  # Exponentially smoothed frame time (seconds)
+        self.last_change = 0  # Frame of the last level change
+        self.throttled = {}  # Value name -> (frame refreshed, value)
+
+        # Counters
+        self.frames = 0
+        self.over_budget_frames = 0
+        self.degrades = 0
+        self.restores = 0
+        self.frames_at_level = [0] * (len(DEGRADATIONS) + 1)
+
+    def frame_done(self, frame_time):
+        """Account one gameplay frame; returns True if the level changed"""
+        self.frames += 1
+        self.frames_at_level[self.level] += 1
+        if frame_time > self.budget:
+            self.over_budget_frames += 1
+        self.smoothed += (frame_time - self.smoothed) * self.smoothing
+
+        if self.frames - self.last_change < self.cooldown:
+            return False
+        if self.smoothed > self.budget and self.level < len(DEGRADATIONS):
+            self.level += 1
+            self.degrades += 1
+        elif self.smoothed < self.budget * self.restore_fraction and self.level > 0:
+            self.level -= 1
+            self.restores += 1
+        else:
+            return False
+        self.last_change = self.frames
+        return True
+
+    def reduced(self, name):
+        """True if the named work from DEGRADATIONS is currently dropped"""
+        return DEGRADATIONS.index(name) < self.level
+
+    def throttle(self, name, value):
+        """value, or its last refreshed version while timers are slowed down
+
+        Used in region signatures, so a throttled region is redrawn only
+        every TIMER_DIVISOR frames.
+        """
+        if not self.reduced("timer_rate"):
+            return value
+        refreshed = self.throttled.get(name)
+        if refreshed is None or self.frames - refreshed[0] >= TIMER_DIVISOR:
+            refreshed = self.throttled[name] = (self.frames, value)
+        return refreshed[1]
+
+    def stats(self):
+        """Return the governor counters as a dict"""
+        return {
+            "level": self.level,
+            "dropped": list(DEGRADATIONS[:self.level]),
+            "smoothed_ms": self.smoothed * 1000,
+            "frames": self.frames,
+            "over_budget_frames": self.over_budget_frames,
+            "degrades": self.degrades,
+            "restores": self.restores,
+            "frames_at_level": list(self.frames_at_level),
+        }
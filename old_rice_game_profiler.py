@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Frame profiler for 古米マーケット (Old Rice Market)
+
+FrameProfiler times each phase of the main loop and the latency from a key
+press to the frame that shows its result. Samples are kept in fixed-size
+ring buffers, so a long session costs constant memory. It has no pygame
+dependency; the game only creates one when profiling is requested.
+"""
+import json
+import time
+from collections import deque
+
+# Main loop phases, in the order they run
+PHASES = ("events", "input", "update", "draw", "flip", "idle")
+
+# Frames (and key presses) kept in the ring buffers
+PROFILE_HISTORY = 600
+
+# A frame counts as dropped when it takes this many frame budgets or more
+DROPPED_FRAME_FACTOR = 1.5
+
+# Frames between refreshes of the summary shown on screen
+SUMMARY_INTERVAL = 30
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def distribution(values):
+    """p50/p95/p99 of the samples in milliseconds"""
+    ordered = sorted(values)
+    return {
+        "p50": percentile(ordered, 0.50) * 1000,
+        "p95": percentile(ordered, 0.95) * 1000,
+        "p99": percentile(ordered, 0.99) * 1000,
+    }
+
+
+class FrameProfiler:
+    """Per-phase frame timings and input-to-display latency"""
+
+    def __init__(self, history=PROFILE_HISTORY, frame_budget=1 / 60, timer=time.perf_counter):
+        self.timer = timer
+        self.frame_budget = frame_budget
+        self.samples = {phase: deque(maxlen=history) for phase in PHASES}  # Phase -> seconds per frame
+        self.frame_times = deque(maxlen=history)
+        self.latencies = deque(maxlen=history)  # Key press to presented frame (seconds)
+        self.frames = 0
+        self.dropped_frames = 0
+        self.current = dict.fromkeys(PHASES, 0.0)  # Phase times of the frame in progress
+        self.pending_inputs = []  # Key press times not yet shown on screen
+        self.frame_start = self.last_mark = timer()
+        self.cached_summary = None
+        self.cached_summary_frame = -SUMMARY_INTERVAL
+
+    def begin_frame(self):
+        """Start timing a new frame"""
+        self.frame_start = self.last_mark = self.timer()
+        for phase in PHASES:
+            self.current[phase] = 0.0
+
+    def mark(self, phase):
+        """Charge the time since the previous mark to `phase`"""
+        now = self.timer()
+        self.current[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def key_down(self):
+        """Record a key press waiting to be shown"""
+        self.pending_inputs.append(self.timer())
+
+    def presented(self):
+        """Record that a frame reached the display"""
+        if self.pending_inputs:
+            now = self.timer()
+            self.latencies.extend(now - pressed for pressed in self.pending_inputs)
+            self.pending_inputs.clear()
+
+    def end_frame(self):
+        """Store the finished frame's timings"""
+        for phase in PHASES:
+            self.samples[phase].append(self.current[phase])
+        frame_time = self.last_mark - self.frame_start
+        self.frame_times.append(frame_time)
+        self.frames += 1
+        if frame_time >= self.frame_budget * DROPPED_FRAME_FACTOR:
+            self.dropped_frames += 1
+
+    def summary(self):
+        """Return the percentiles of every phase, the frame and the latency"""
+        return {
+            "phases": {phase: distribution(self.samples[phase]) for phase in PHASES},
+            "frame": distribution(self.frame_times),
+            "latency": distribution(self.latencies),
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+        }
+
+    def overlay_summary(self):
+        """Summary refreshed every SUMMARY_INTERVAL frames, for on-screen display"""
+        if self.frames - self.cached_summary_frame >= SUMMARY_INTERVAL:
+            self.cached_summary = self.summary()
+            self.cached_summary_frame = self.frames
+        return self.cached_summary
+
+    def export(self, path, extra=None):
+        """Write the summary, the raw samples (in seconds) and any extra fields as JSON"""
+        data = self.summary()
+        data.update(extra or {})
+        data["samples"] = {phase: list(self.samples[phase]) for phase in PHASES}
+        data["samples"]["frame"] = list(self.frame_times)
+        data["samples"]["latency"] = list(self.latencies)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
@@ -1,12 +1,27 @@
 #!/usr/bin/env python3
+import time
+
+# Start of the startup report's measurements (before pygame is imported)
+PROCESS_START = time.perf_counter()
+
+import argparse
+import json
 import pygame
+import sqlite3
 import sys
-import time
-import random
-from collections import deque
+from collections import OrderedDict
+from itertools import islice
+
+from old_rice_game_core import GameCore, KEY_OLD, KEY_RICE
+from old_rice_game_display import BACKENDS, open_display
+from old_rice_game_fonts import FontLoader
+from old_rice_game_governor import FrameGovernor, REDUCED_INVENTORY_ROWS, REDUCED_LOOKAHEAD
+from old_rice_game_profiler import FrameProfiler, PHASES
+from old_rice_game_replay import ReplayPlayer, ReplayReader, record_session
+from old_rice_game_scores import ScoreStore
+from old_rice_game_telemetry import SessionTelemetry
 
-# Initialize pygame
-pygame.init()
+MODULES_LOADED = time.perf_counter()
 
 # Constants
 SCREEN_WIDTH = 800
@@ -20,94 +35,280 @@ GREEN = (0, 128, 0)
 RED = (255, 0, 0)
 BLUE = (0, 0, 255)
 
-class OldRiceGame:
+# Pygame keys mapped to the core's abstract keys
+KEY_MAP = {pygame.K_f: KEY_OLD, pygame.K_j: KEY_RICE}
+
+# Maximum number of rendered text surfaces kept in the text cache
+TEXT_CACHE_SIZE = 256
+
+# Colors of the sequence strip and input line
+TARGET_GRAY = (100, 100, 100)
+HINT_COLOR = (100, 100, 100, 128)
+
+# Longest the intro and game-over screens block waiting for an event (ms);
+# the loop still wakes up now and then, e.g. so Ctrl+C gets handled
+IDLE_WAIT_MS = 1000
+
+# Events after which the window contents have to be pushed again
+REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED, pygame.WINDOWSIZECHANGED)
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces"""
+
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()  # (text, font, color, antialias) -> Surface
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, text, font, color, antialias=True):
+        """Return the rendered surface for text, rendering it only on a miss"""
+        key = (text, font, color, antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_size:
+            # Drop the least recently used surface
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        """Drop every cached surface (counters are kept)"""
+        self.entries.clear()
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class GlyphAtlas:
+    """Single-character surfaces rasterized once per font and color
+    
+    Strings over the game's small alphabet (古, 米, digits, punctuation) are
+    drawn by blitting cached glyphs at cached advance widths, so changing
+    text never needs a font render.
+    """
+
     def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("古米マーケット (Old Rice Market)")
-        
-        # Game state
-        self.current_sequence = ""
-        self.target_sequence = ""
-        self.target_sequences = []
-        self.current_target_index = 0
-        self.full_target_string = ""  # The full continuous string of all sequences
-        self.inventory = deque()  # Store sets of rice
-        self.game_running = False
-        self.game_state = "intro"  # intro, playing, game_over
-        self.start_time = 0
-        self.elapsed_time = 0
-        self.consumption_constant = 0.5  # Constant for consumption rate
-        self.score = 0
-        self.error_flash = 0  # Counter for error flash effect
-        self.error_penalty = 0  # Counter for error penalty (in frames)
-        self.error_penalty_time = 3 * 60  # 3 seconds at 60 FPS
-        self.consumption_boost = 1.0  # Multiplier for consumption speed (increases on error)
-        self.error_count = 0  # Count of errors made
-        self.max_errors = 3  # Maximum allowed errors
-        
-        # Fonts
-        self.title_font = pygame.font.SysFont('notosanscjkjp', 48)
-        self.large_font = pygame.font.SysFont('notosanscjkjp', 32)
-        self.medium_font = pygame.font.SysFont('notosanscjkjp', 24)
-        self.small_font = pygame.font.SysFont('notosanscjkjp', 18)
+        self.glyphs = {}  # (font, color) -> {char: Surface}
+        self.advances = {}  # font -> {char: advance width}
+        self.rasterized = 0
+
+    def glyph(self, font, color, char):
+        """Return the surface for one character, rasterizing it on first use"""
+        table = self.glyphs.get((font, color))
+        if table is None:
+            table = self.glyphs[(font, color)] = {}
+        surface = table.get(char)
+        if surface is None:
+            surface = table[char] = font.render(char, True, color)
+            self.rasterized += 1
+        return surface
+
+    def advance(self, font, char):
+        """Horizontal advance of one character"""
+        table = self.advances.get(font)
+        if table is None:
+            table = self.advances[font] = {}
+        width = table.get(char)
+        if width is None:
+            width = table[char] = font.size(char)[0]
+        return width
+
+    def prewarm(self, font, colors, chars):
+        """Rasterize chars in every color ahead of time"""
+        for color in colors:
+            for char in chars:
+                self.glyph(font, color, char)
+                self.advance(font, char)
+
+    def measure(self, font, runs):
+        """Width of a sequence of (text, color) runs"""
+        return sum(self.advance(font, char) for text, _ in runs for char in text)
+
+    def draw_runs(self, surface, font, runs, x, y):
+        """Blit (text, color) runs side by side in one pass; returns the end x"""
+        blits = []
+        for text, color in runs:
+            for char in text:
+                blits.append((self.glyph(font, color, char), (x, y)))
+                x += self.advance(font, char)
+        surface.blits(blits, doreturn=False)
+        return x
+
+
+class OldRiceGame:
+    def __init__(self, render_mode="dirty", seed=None, profile=False, profile_out=None,
+                 record=None, replay=None, font_cache=None, scores=None, keep_scores=True,
+                 telemetry=None, backend="auto", software_renderer=False, governor=True):
+        init_start = time.perf_counter()
+        
+        # Only the subsystems the game uses (pygame.init() would also start audio etc.)
+        pygame.display.init()
+        pygame.font.init()
+        # SDL renderer with cached textures when available, else the display Surface
+        self.display = open_display(backend, (SCREEN_WIDTH, SCREEN_HEIGHT), "古米マーケット (Old Rice Market)",
+                                    software_renderer)
+        display_ready = time.perf_counter()
+        
+        # Game rules and state live in the headless core; this class is only a view
+        # A replay drives its own core from the log, paced by the real clock
+        self.replay_reader = ReplayReader(replay) if replay else None
+        self.player = ReplayPlayer(self.replay_reader) if replay else None
+        self.core = self.player.core if replay else GameCore(seed=seed)
+        self.recorder = record_session(self.core, record) if record else None
+        
+        # Leaderboard (replays are not scored again); rank of the finished game
+        self.scores = None
+        if keep_scores and not replay:
+            try:
+                self.scores = ScoreStore(scores)
+            except (OSError, sqlite3.Error):
+                pass  # No writable data directory: play on without a leaderboard
+        self.score_rank = None
+        
+        # Optional gameplay telemetry (a directory, or True for the default one)
+        if telemetry and not replay:
+            self.telemetry = SessionTelemetry(telemetry if isinstance(telemetry, str) else None)
+        else:
+            self.telemetry = None
+        
+        # Fraction of a simulation step between the last step and now, used to
+        # interpolate moving values when drawing
+        self.alpha = 0.0
+        
+        # Fonts: the CJK font file is resolved once (cached on disk) and each
+        # size is loaded on first use
+        self.fonts = FontLoader(cache_path=font_cache)
+        
+        # Cache of rendered text surfaces (most labels are identical every frame)
+        self.text_cache = TextCache()
+        
+        # Glyph atlas for changing text, the sequence strip and the input line
+        self.glyph_atlas = GlyphAtlas()
+        self.glyph_atlas.prewarm(self.large_font, (TARGET_GRAY, BLUE, GREEN, RED, HINT_COLOR), "古米")
+        
+        # Optional frame profiler; None keeps the main loop free of timing calls
+        self.profiler = FrameProfiler() if profile or profile_out else None
+        self.profile_out = profile_out
+        self.show_profiler = True  # Overlay visibility (F3), only used when profiling
+        
+        # Frame-budget governor: drops non-essential drawing while frames run
+        # over budget (it stays at full detail when not fed frame times)
+        self.governor = FrameGovernor()
+        self.governor_enabled = governor
+        
+        # Retained-mode rendering: static layer plus per-region change tracking
+        # ("dirty" pushes only changed regions, "full" redraws and flips every frame)
+        self.render_mode = render_mode
+        self.background = self.build_background()
+        self.regions = self.build_regions()
+        self.region_signatures = {}  # Region name -> signature last drawn
+        
+        # The intro and game-over screens are drawn once into cached surfaces
+        self.static_screens = {}  # Screen name -> (content key, surface)
+        self.shown_screen = None  # Content key of the static screen on the display
         
         # Clock for controlling frame rate
         self.clock = pygame.time.Clock()
         
-        # Generate initial target sequence
-        self.generate_target_sequence()
-
-    def generate_target_sequence(self):
-        """Generate a continuous string of multiple sequences"""
-        # Generate sequences until we have at least 20 characters
-        self.target_sequences = []
-        self.full_target_string = ""
-        
-        while len(self.full_target_string) < 20:
-            # Generate a sequence with 1-5 "古" followed by "米"
-            num_old = random.randint(1, 5)
-            sequence = "古" * num_old + "米"
-            self.target_sequences.append(sequence)
-            self.full_target_string += sequence
-        
-        # Set the current target to the first sequence
-        self.current_target_index = 0
-        self.target_sequence = self.target_sequences[self.current_target_index]
-        
-    def add_new_sequence(self):
-        """Add a new sequence to maintain at least 20 characters"""
-        # Generate a new sequence
-        num_old = random.randint(1, 5)
-        sequence = "古" * num_old + "米"
-        
-        # Add to our lists
-        self.target_sequences.append(sequence)
-        self.full_target_string += sequence
-
-    def draw_text(self, text, font, color, x, y, align="left"):
-        """Draw text on screen with alignment options"""
-        text_surface = font.render(text, True, color)
-        text_rect = text_surface.get_rect()
-        
+        ready = time.perf_counter()
+        self.startup_stats = {
+            "backend": self.display.name,
+            "imports_seconds": MODULES_LOADED - PROCESS_START,
+            "display_init_seconds": display_ready - init_start,
+            "font_resolve_seconds": self.fonts.stats["resolve_seconds"],
+            "font_cache_hit": self.fonts.stats["cache_hit"],
+            "fonts_loaded": sorted(self.fonts.fonts),
+            "init_seconds": ready - init_start,
+            "total_seconds": ready - PROCESS_START,
+        }
+
+    @property
+    def title_font(self):
+        """48px font"""
+        return self.fonts.get(48)
+
+    @property
+    def large_font(self):
+        """32px font"""
+        return self.fonts.get(32)
+
+    @property
+    def medium_font(self):
+        """24px font"""
+        return self.fonts.get(24)
+
+    @property
+    def small_font(self):
+        """18px font"""
+        return self.fonts.get(18)
+
+    def write_startup_report(self, path):
+        """Write startup_stats as JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.startup_stats, f, indent=2)
+
+    def draw_text(self, text, font, color, x, y, align="left", volatile=False, surface=None):
+        """Draw text on screen with alignment options
+        
+        Volatile text (timers, remaining amounts) is drawn from the glyph atlas,
+        so changing values reuse a handful of glyph surfaces instead of adding
+        a new cache entry for every distinct string.
+        """
+        if volatile:
+            return self.draw_runs([(text, color)], font, x, y, align, surface)
+        
+        text_surface = self.text_cache.render(text, font, color)
+        text_rect = self.align_rect(text_surface.get_rect(), x, y, align)
+        (surface or self.display).blit(text_surface, text_rect)
+        return text_rect
+
+    def draw_runs(self, runs, font, x, y, align="left", surface=None):
+        """Draw (text, color) runs as one line from the glyph atlas"""
+        width = self.glyph_atlas.measure(font, runs)
+        text_rect = self.align_rect(pygame.Rect(0, 0, width, font.get_height()), x, y, align)
+        self.glyph_atlas.draw_runs(surface or self.display, font, runs, text_rect.left, text_rect.top)
+        return text_rect
+
+    def align_rect(self, rect, x, y, align):
+        """Position rect at (x, y) with the given alignment"""
         if align == "center":
-            text_rect.center = (x, y)
+            rect.center = (x, y)
         elif align == "right":
-            text_rect.right = x
-            text_rect.top = y
+            rect.right = x
+            rect.top = y
         else:  # left
-            text_rect.left = x
-            text_rect.top = y
-            
-        self.screen.blit(text_surface, text_rect)
-        return text_rect
+            rect.left = x
+            rect.top = y
+        return rect
 
     def show_intro(self):
         """Display game introduction screen"""
-        self.screen.fill(LIGHT_BROWN)
+        self.show_static_screen(("intro",), self.draw_intro)
+
+    def draw_intro(self, surface):
+        """Draw the introduction screen onto surface"""
+        surface.fill(LIGHT_BROWN)
         
         # Title
-        self.draw_text("古米マーケット", self.title_font, DARK_BROWN, SCREEN_WIDTH//2, 100, "center")
-        self.draw_text("Old Rice Market", self.large_font, DARK_BROWN, SCREEN_WIDTH//2, 150, "center")
+        self.draw_text("古米マーケット", self.title_font, DARK_BROWN, SCREEN_WIDTH//2, 100, "center", surface=surface)
+        self.draw_text("Old Rice Market", self.large_font, DARK_BROWN, SCREEN_WIDTH//2, 150, "center", surface=surface)
         
         # Key instructions
         key_instructions = [
@@ -118,7 +319,7 @@ class OldRiceGame:
         
         y_pos = 210
         for line in key_instructions:
-            self.draw_text(line, self.medium_font, BLACK, SCREEN_WIDTH//2, y_pos, "center")
+            self.draw_text(line, self.medium_font, BLACK, SCREEN_WIDTH//2, y_pos, "center", surface=surface)
             y_pos += 30
         
         # Simple instructions (3 lines)
@@ -130,360 +331,569 @@ class OldRiceGame:
         
         y_pos = 330
         for line in instructions:
-            self.draw_text(line, self.large_font, BLACK, SCREEN_WIDTH//2, y_pos, "center")
+            self.draw_text(line, self.large_font, BLACK, SCREEN_WIDTH//2, y_pos, "center", surface=surface)
             y_pos += 50
         
         # Start prompt - make button wider to fit text
         button_width = 350
-        pygame.draw.rect(self.screen, GREEN, (SCREEN_WIDTH//2 - button_width//2, 500, button_width, 50), border_radius=10)
-        self.draw_text("Enterキーを押してスタート", self.medium_font, WHITE, SCREEN_WIDTH//2, 525, "center")
-        
-        pygame.display.flip()
+        pygame.draw.rect(surface, GREEN, (SCREEN_WIDTH//2 - button_width//2, 500, button_width, 50), border_radius=10)
+        self.draw_text("Enterキーを押してスタート", self.medium_font, WHITE, SCREEN_WIDTH//2, 525, "center", surface=surface)
 
     def show_game_over(self):
         """Display game over screen"""
-        self.screen.fill(LIGHT_BROWN)
+        self.show_static_screen(("game_over", self.core.score, self.core.end_reason, self.score_rank),
+                                self.draw_game_over)
+
+    def draw_game_over(self, surface):
+        """Draw the game over screen onto surface"""
+        surface.fill(LIGHT_BROWN)
         
         # Game over title
-        self.draw_text("ゲーム終了！", self.title_font, DARK_BROWN, SCREEN_WIDTH//2, 100, "center")
+        self.draw_text("ゲーム終了！", self.title_font, DARK_BROWN, SCREEN_WIDTH//2, 100, "center", surface=surface)
         
         # Show reason for game over
-        if self.error_count >= self.max_errors:
-            self.draw_text("ミス回数オーバー！", self.large_font, RED, SCREEN_WIDTH//2, 160, "center")
+        if self.core.end_reason == "errors":
+            self.draw_text("ミス回数オーバー！", self.large_font, RED, SCREEN_WIDTH//2, 160, "center", surface=surface)
         else:
-            self.draw_text("在庫切れ！", self.large_font, RED, SCREEN_WIDTH//2, 160, "center")
+            self.draw_text("在庫切れ！", self.large_font, RED, SCREEN_WIDTH//2, 160, "center", surface=surface)
         
         # Score - changed from "スコア" to "維持時間"
-        self.draw_text(f"維持時間: {self.score:.1f}秒", self.large_font, BLACK, SCREEN_WIDTH//2, 220, "center")
+        self.draw_text(f"維持時間: {self.core.score:.1f}秒", self.large_font, BLACK, SCREEN_WIDTH//2, 220, "center",
+                       surface=surface)
+        
+        # Rank among all recorded runs
+        if self.score_rank is not None:
+            total = self.scores.total
+            self.draw_text(f"順位: {self.score_rank}位 / {total}回 (上位 {self.score_rank / total * 100:.0f}%)",
+                           self.medium_font, DARK_BROWN, SCREEN_WIDTH//2, 270, "center", surface=surface)
         
         # Restart prompt - make button wider to fit text
         button_width = 350
-        pygame.draw.rect(self.screen, GREEN, (SCREEN_WIDTH//2 - button_width//2, 320, button_width, 50), border_radius=10)
-        self.draw_text("Enterキーでもう一度プレイ", self.medium_font, WHITE, SCREEN_WIDTH//2, 345, "center")
+        pygame.draw.rect(surface, GREEN, (SCREEN_WIDTH//2 - button_width//2, 320, button_width, 50), border_radius=10)
+        self.draw_text("Enterキーでもう一度プレイ", self.medium_font, WHITE, SCREEN_WIDTH//2, 345, "center", surface=surface)
         
         # Quit prompt
-        pygame.draw.rect(self.screen, RED, (SCREEN_WIDTH//2 - button_width//2, 390, button_width, 50), border_radius=10)
-        self.draw_text("Escキーで終了", self.medium_font, WHITE, SCREEN_WIDTH//2, 415, "center")
-        
-        pygame.display.flip()
+        pygame.draw.rect(surface, RED, (SCREEN_WIDTH//2 - button_width//2, 390, button_width, 50), border_radius=10)
+        self.draw_text("Escキーで終了", self.medium_font, WHITE, SCREEN_WIDTH//2, 415, "center", surface=surface)
+
+    def show_static_screen(self, key, draw):
+        """Show a full-screen page, touching the display only when it isn't there yet
+
+        key identifies the page content (its first item names the page); the
+        page is drawn into its cached surface only when that content changes.
+        """
+        if self.shown_screen == key:
+            return
+        cached_key, surface = self.static_screens.get(key[0], (None, None))
+        if cached_key != key:
+            if surface is None:
+                surface = self.display.new_surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            draw(surface)
+            self.display.changed(surface)
+            self.static_screens[key[0]] = (key, surface)
+        
+        self.invalidate_display()
+        self.display.blit(surface, (0, 0))
+        self.present()
+        self.shown_screen = key
+
+    def build_background(self):
+        """Pre-compose the static layer of the gameplay screen"""
+        background = self.display.new_surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        background.fill(LIGHT_BROWN)
+        
+        # Key instructions and the row labels never change during play
+        self.draw_text("f:「古」 j:「米」", self.small_font, DARK_BROWN, SCREEN_WIDTH//2, 20, "center", surface=background)
+        self.draw_text("目標:", self.medium_font, BLACK, 20, 120, surface=background)
+        self.draw_text("入力:", self.medium_font, BLACK, 20, 160, surface=background)
+        self.draw_text("【在庫状況】", self.medium_font, BLACK, 20, 300, surface=background)
+        return background
+
+    def build_regions(self):
+        """Describe the dynamic regions of the gameplay screen
+        
+        Each region is (name, rect, signature, draw). The rect must bound
+        everything the draw function paints; the signature changes whenever
+        the region would look different.
+        """
+        medium_height = self.medium_font.get_linesize()
+        large_height = self.large_font.get_linesize()
+        return [
+            ("timer", pygame.Rect(0, 15, 330, medium_height + 10),
+             lambda: self.governor.throttle("timer", f"{self.core.display_elapsed_time(self.alpha):.1f}"),
+             self.draw_timer),
+            ("status", pygame.Rect(460, 15, SCREEN_WIDTH - 460, 70 + medium_height),
+             lambda: (self.core.consumption_boost, self.core.error_count, self.core.max_errors,
+                      self.core.current_target_index, self.core.sequences.generated),
+             self.draw_status),
+            ("target", pygame.Rect(95, 115, SCREEN_WIDTH - 95, large_height + 10),
+             lambda: (self.core.full_target_string, self.core.target_sequence), self.draw_target),
+            ("input", pygame.Rect(95, 155, SCREEN_WIDTH - 95, large_height + 10),
+             lambda: (self.core.current_sequence, self.core.target_sequence, self.core.error_penalty == 0),
+             self.draw_input),
+            ("error", pygame.Rect(0, 205 - medium_height//2, SCREEN_WIDTH, 40 + medium_height),
+             lambda: (self.core.error_flash > 0,
+                      self.core.error_penalty > 0 and self.governor.throttle("penalty", f"{self.core.error_penalty:.1f}")),
+             self.draw_error),
+            ("inventory_count", pygame.Rect(15, 265, 400, medium_height + 10),
+             lambda: len(self.core.inventory), self.draw_inventory_count),
+            ("stockout", pygame.Rect(420, 265, SCREEN_WIDTH - 420, medium_height + 10),
+             lambda: self.governor.throttle("stockout", f"{self.core.time_until_stockout(self.alpha):.1f}"),
+             self.draw_stockout),
+            ("inventory_front", pygame.Rect(10, 330, SCREEN_WIDTH - 10, max(40, medium_height + 10)),
+             self.inventory_front_signature, self.draw_inventory_front),
+            ("inventory_rest", pygame.Rect(0, 370, SCREEN_WIDTH, SCREEN_HEIGHT - 370),
+             lambda: (tuple(islice(self.core.inventory, 1, self.visible_inventory_rows())),
+                      len(self.core.inventory) > self.visible_inventory_rows()),
+             self.draw_inventory_rest),
+            # Drawn last so it stays on top of the regions it overlaps
+            ("profiler", self.profiler_overlay_rect(),
+             lambda: self.profiler is not None and self.show_profiler and self.profiler.overlay_summary(),
+             self.draw_profiler),
+        ]
+
+    def invalidate_display(self):
+        """Force the next gameplay frame to be drawn in full"""
+        self.region_signatures.clear()
 
     def update_game_display(self):
         """Update the main game display"""
-        self.screen.fill(LIGHT_BROWN)
-        
-        # Update elapsed time
-        self.elapsed_time = time.time() - self.start_time
-        
-        # Display time
-        self.draw_text(f"経過時間: {self.elapsed_time:.1f}秒", self.medium_font, BLACK, 20, 20)
-        
+        self.shown_screen = None
+        if self.render_mode == "full" or not self.region_signatures:
+            # Full-frame mode: redraw everything and flip the whole screen
+            self.draw_full_frame()
+            return
+        
+        # Dirty-rectangle mode: only redraw regions whose content changed
+        dirty = set()
+        for name, rect, signature, draw in self.regions:
+            current = signature()
+            if self.region_signatures.get(name) != current:
+                self.region_signatures[name] = current
+                dirty.add(name)
+        
+        if not dirty:
+            return
+        
+        if self.display.full_frames:
+            # The renderer keeps no previous frame to patch; with everything
+            # cached as textures a whole frame is cheap anyway
+            self.draw_full_frame()
+            return
+        
+        # Restoring the background of a dirty region erases any overlapping
+        # region, so those have to be repainted as well
+        changed = True
+        while changed:
+            changed = False
+            dirty_rects = [rect for name, rect, _, _ in self.regions if name in dirty]
+            for name, rect, _, _ in self.regions:
+                if name not in dirty and rect.collidelist(dirty_rects) != -1:
+                    dirty.add(name)
+                    changed = True
+        
+        update_rects = []
+        for name, rect, _, _ in self.regions:
+            if name in dirty:
+                self.display.blit(self.background, rect, rect)
+        for name, rect, _, draw in self.regions:
+            if name in dirty:
+                self.display.set_clip(rect)
+                draw()
+                update_rects.append(rect)
+        self.display.set_clip(None)
+        
+        self.present(update_rects)
+
+    def draw_full_frame(self):
+        """Draw the background and every region, then present the whole screen"""
+        self.display.blit(self.background, (0, 0))
+        for name, rect, signature, draw in self.regions:
+            self.region_signatures[name] = signature()
+            self.display.set_clip(rect)
+            draw()
+        self.display.set_clip(None)
+        self.present()
+
+    def present(self, rects=None):
+        """Push the drawn frame to the display (all of it when rects is None)"""
+        if self.profiler:
+            self.profiler.mark("draw")
+        self.display.present(rects)
+        if self.profiler:
+            self.profiler.mark("flip")
+            self.profiler.presented()
+
+    def draw_timer(self):
+        """Draw the elapsed time"""
+        self.draw_text(f"経過時間: {self.core.display_elapsed_time(self.alpha):.1f}秒", self.medium_font, BLACK, 20, 20, volatile=True)
+
+    def draw_status(self):
+        """Draw consumption boost, error count and sequence progress"""
         # Display consumption boost
-        boost_text = f"消化速度: {self.consumption_boost:.1f}倍"
-        boost_color = RED if self.consumption_boost > 1.0 else BLACK
+        boost_text = f"消化速度: {self.core.consumption_boost:.1f}倍"
+        boost_color = RED if self.core.consumption_boost > 1.0 else BLACK
         self.draw_text(boost_text, self.medium_font, boost_color, SCREEN_WIDTH - 20, 20, "right")
         
         # Display error count
-        error_text = f"ミス: {self.error_count}/{self.max_errors}"
-        error_color = RED if self.error_count > 0 else BLACK
+        error_text = f"ミス: {self.core.error_count}/{self.core.max_errors}"
+        error_color = RED if self.core.error_count > 0 else BLACK
         self.draw_text(error_text, self.medium_font, error_color, SCREEN_WIDTH - 20, 50, "right")
         
         # Display progress through sequences
-        progress_text = f"進捗: {self.current_target_index + 1}/{len(self.target_sequences)}"
+        progress_text = f"進捗: {self.core.current_target_index + 1}/{self.core.sequences.generated}"
         self.draw_text(progress_text, self.medium_font, BLACK, SCREEN_WIDTH - 20, 80, "right")
-        
-        # Display key instructions
-        self.draw_text("f:「古」 j:「米」", self.small_font, DARK_BROWN, SCREEN_WIDTH//2, 20, "center")
-        
-        # Display the full target string with the current sequence highlighted - moved much lower
-        self.draw_text("目標:", self.medium_font, BLACK, 20, 120)
-        
-        # Display the full target string - moved down to avoid overlap
-        if self.full_target_string:
-            # Draw the full string in gray
-            self.draw_text(self.full_target_string, self.large_font, (100, 100, 100), 100, 120)
-            
-            # Draw the current target in blue (overlay on top of the gray text)
-            self.draw_text(self.target_sequence, self.large_font, BLUE, 100, 120)
-        
-        # Display current sequence - also moved down
-        self.draw_text("入力:", self.medium_font, BLACK, 20, 160)
-        
-        # Display current input with color coding
-        x_pos = 100
-        for i, char in enumerate(self.current_sequence):
-            if i < len(self.target_sequence) and char == self.target_sequence[i]:
-                color = GREEN
+
+    def draw_target(self):
+        """Draw the full target string with the current sequence highlighted"""
+        if self.core.full_target_string:
+            # The window starts with the current target: blue, then the rest in gray
+            target = self.core.target_sequence
+            lookahead = self.core.full_target_string[len(target):]
+            if self.governor.reduced("target_strip"):
+                lookahead = lookahead[:REDUCED_LOOKAHEAD]
+            self.draw_runs([(target, BLUE), (lookahead, TARGET_GRAY)], self.large_font, 100, 120)
+
+    def draw_input(self):
+        """Draw the current input with color coding and the next-key hint"""
+        current = self.core.current_sequence
+        target = self.core.target_sequence
+        runs = []
+        for i, char in enumerate(current):
+            if i < len(target) and char == target[i]:
+                runs.append((char, GREEN))
             else:
-                color = RED
-            char_rect = self.draw_text(char, self.large_font, color, x_pos, 160)
-            x_pos = char_rect.right
+                runs.append((char, RED))
         
         # Add visual indicator for next expected character
-        if len(self.current_sequence) < len(self.target_sequence) and self.error_penalty == 0:
-            next_char = self.target_sequence[len(self.current_sequence)]
-            # Make the hint more transparent
-            self.draw_text(next_char, self.large_font, (100, 100, 100, 128), x_pos, 160)  # Semi-transparent hint
-        
-        # Display error flash and penalty if active
-        if self.error_flash > 0:
-            # No red rectangle anymore - removed as requested
-            self.error_flash -= 1
-            
+        if len(current) < len(target) and self.core.error_penalty == 0 and not self.governor.reduced("hint"):
+            runs.append((target[len(current)], HINT_COLOR))  # Semi-transparent hint
+        
+        self.draw_runs(runs, self.large_font, 100, 160)
+
+    def draw_error(self):
+        """Draw the error banner and penalty countdown"""
+        if self.core.error_flash > 0:
             # Show error message - moved down to avoid overlap
             self.draw_text("入力ミス! 最初からやり直してください", self.medium_font, RED, SCREEN_WIDTH//2, 210, "center")
             
             # Show penalty countdown
-            if self.error_penalty > 0:
-                seconds_left = self.error_penalty / 60  # Convert frames to seconds
-                self.draw_text(f"入力再開まで: {seconds_left:.1f}秒", self.medium_font, RED, SCREEN_WIDTH//2, 240, "center")
-                self.error_penalty -= 1
-                
-                # Reset current sequence when penalty ends
-                if self.error_penalty == 1:  # Reset just before penalty ends
-                    self.current_sequence = ""
-        
-        # Display inventory count
-        self.draw_text(f"在庫セット数: {len(self.inventory)}", self.medium_font, BLACK, 20, 270)
-        
-        # Display inventory details
-        if self.inventory:
-            self.draw_text("【在庫状況】", self.medium_font, BLACK, 20, 300)
-            
-            y_pos = 340
-            for i, (rice_set, remaining) in enumerate(self.inventory):
-                if y_pos > SCREEN_HEIGHT - 50:  # Prevent drawing outside screen
-                    self.draw_text("...", self.medium_font, BLACK, 20, y_pos)
-                    break
-                
-                # Highlight the currently consuming item
-                bg_color = None
-                if i == 0:  # First item is being consuming
-                    # Draw a light highlight behind the first item
-                    highlight_rect = pygame.Rect(15, y_pos - 5, 580, 35)
-                    pygame.draw.rect(self.screen, (255, 240, 200), highlight_rect)
-                    self.draw_text("消化中 ▶", self.small_font, DARK_BROWN, 20, y_pos)
-                    item_x = 100
-                else:
-                    item_x = 20
-                
-                # Draw set text - moved to left side
-                set_text = f"{i+1}. {rice_set}"
-                self.draw_text(set_text, self.medium_font, BLACK, item_x, y_pos)
-                
-                # Calculate width of the set text to position progress bar properly
-                set_text_width = self.medium_font.size(set_text)[0]
-                progress_bar_start = max(item_x + set_text_width + 20, 250)  # Add padding
-                
-                # Draw progress bar - adjusted position
-                progress = remaining / len(rice_set)
-                bar_width = 250
-                pygame.draw.rect(self.screen, GRAY, (progress_bar_start, y_pos + 5, bar_width, 20))
-                pygame.draw.rect(self.screen, GREEN, (progress_bar_start, y_pos + 5, int(bar_width * progress), 20))
-                
-                # Draw remaining text - adjusted position
-                self.draw_text(f"{remaining:.1f}/{len(rice_set)}", self.small_font, BLACK, 
-                               progress_bar_start + bar_width + 10, y_pos + 5)
-                
-                y_pos += 40
-        
-        pygame.display.flip()
+            if self.core.error_penalty > 0:
+                self.draw_text(f"入力再開まで: {self.core.error_penalty:.1f}秒", self.medium_font, RED, SCREEN_WIDTH//2, 240, "center", volatile=True)
+
+    def profiler_overlay_rect(self):
+        """Screen area of the profiler overlay (bottom right, ten lines)"""
+        height = 10 + 10 * self.small_font.get_linesize()
+        return pygame.Rect(SCREEN_WIDTH - 330, SCREEN_HEIGHT - height, 330, height)
+
+    def draw_profiler(self):
+        """Draw the profiler overlay (phase times, latency, dropped frames)"""
+        if self.profiler is None or not self.show_profiler:
+            return
+        summary = self.profiler.overlay_summary()
+        rect = self.profiler_overlay_rect()
+        self.display.fill_rect(BLACK, rect)
+        
+        lines = [("ms", {"p50": "p50", "p95": "p95", "p99": "p99"})]
+        lines += [(phase, summary["phases"][phase]) for phase in PHASES]
+        lines += [("frame", summary["frame"]), ("latency", summary["latency"])]
+        line_height = self.small_font.get_linesize()
+        y_pos = rect.top + 5
+        for label, values in lines:
+            self.draw_text(label, self.small_font, WHITE, rect.left + 10, y_pos)
+            for column, key in enumerate(("p50", "p95", "p99")):
+                value = values[key]
+                text = value if isinstance(value, str) else f"{value:.2f}"
+                self.draw_text(text, self.small_font, WHITE, rect.left + 170 + column * 70, y_pos, "right", volatile=True)
+            y_pos += line_height
+        self.draw_text(f"dropped: {summary['dropped_frames']}/{summary['frames']}  detail: -{self.governor.level}",
+                       self.small_font, WHITE, rect.left + 10, y_pos, volatile=True)
+
+    def draw_inventory_count(self):
+        """Draw the number of sets in inventory"""
+        self.draw_text(f"在庫セット数: {len(self.core.inventory)}", self.medium_font, BLACK, 20, 270)
+
+    def draw_stockout(self):
+        """Draw the time until the whole inventory is consumed"""
+        self.draw_text(f"在庫切れまで: {self.core.time_until_stockout(self.alpha):.1f}秒", self.medium_font, BLACK,
+                       SCREEN_WIDTH - 20, 270, "right", volatile=True)
+
+    def visible_inventory_rows(self):
+        """Number of inventory rows that fit on screen (fewer when the governor reduces them)"""
+        rows = (SCREEN_HEIGHT - 50 - 340) // 40 + 1
+        if self.governor.reduced("inventory_rows"):
+            return min(rows, 1 + REDUCED_INVENTORY_ROWS)
+        return rows
+
+    def interpolated_front_item(self):
+        """The item being consumed, with its remaining amount interpolated"""
+        if not self.core.inventory:
+            return None
+        return (self.core.inventory[0][0], self.core.display_front_remaining(self.alpha))
+
+    def inventory_front_signature(self):
+        """Front row signature; only the remaining amount is ever throttled
+        
+        The queue length identifies the front item, so a consumed item is
+        replaced at once even while the governor slows the progress bar down.
+        """
+        front = self.interpolated_front_item()
+        if front is None:
+            return None
+        return len(self.core.inventory), front[0], self.governor.throttle("front", front[1])
+
+    def draw_inventory_front(self):
+        """Draw the item currently being consumed"""
+        front = self.interpolated_front_item()
+        if front is not None:
+            self.draw_inventory_row(0, *front)
 
-    def consume_inventory(self):
-        """Consume inventory sets one at a time (serially)"""
-        if not self.inventory:
-            return False  # No change in inventory
+    def draw_inventory_rest(self):
+        """Draw the queued inventory items below the front item"""
+        visible_rows = self.visible_inventory_rows()
+        for i, (rice_set, remaining) in enumerate(self.core.inventory):
+            if i == 0:
+                continue
+            if i >= visible_rows:  # Prevent drawing outside screen
+                self.draw_text("...", self.medium_font, BLACK, 20, 340 + i * 40)
+                break
+            self.draw_inventory_row(i, rice_set, remaining)
+
+    def draw_inventory_row(self, i, rice_set, remaining):
+        """Draw one inventory row with its progress bar"""
+        y_pos = 340 + i * 40
+        
+        # Highlight the currently consuming item
+        if i == 0:  # First item is being consuming
+            # Draw a light highlight behind the first item
+            highlight_rect = pygame.Rect(15, y_pos - 5, 580, 35)
+            self.display.fill_rect((255, 240, 200), highlight_rect)
+            self.draw_text("消化中 ▶", self.small_font, DARK_BROWN, 20, y_pos)
+            item_x = 100
+        else:
+            item_x = 20
         
-        # Only process the first item in inventory (FIFO)
-        rice_set, remaining = self.inventory[0]
+        # Draw set text - moved to left side
+        set_text = f"{i+1}. {rice_set}"
+        self.draw_text(set_text, self.medium_font, BLACK, item_x, y_pos)
         
-        # Reduce remaining based on length, applying consumption boost
-        consumption_rate = 0.016 / (len(rice_set) * self.consumption_constant) * self.consumption_boost
-        new_remaining = remaining - consumption_rate
+        # Calculate width of the set text to position progress bar properly
+        set_text_width = self.medium_font.size(set_text)[0]
+        progress_bar_start = max(item_x + set_text_width + 20, 250)  # Add padding
         
-        if new_remaining <= 0:
-            # Remove the consumed item
-            self.inventory.popleft()
-            return True
-        else:
-            # Update the remaining value
-            self.inventory[0] = (rice_set, new_remaining)
-            return True
+        # Draw progress bar - adjusted position
+        progress = remaining / len(rice_set)
+        bar_width = 250
+        self.display.fill_rect(GRAY, (progress_bar_start, y_pos + 5, bar_width, 20))
+        self.display.fill_rect(GREEN, (progress_bar_start, y_pos + 5, int(bar_width * progress), 20))
         
-        return False
+        # Draw remaining text - adjusted position
+        self.draw_text(f"{remaining:.1f}/{len(rice_set)}", self.small_font, BLACK, 
+                       progress_bar_start + bar_width + 10, y_pos + 5, volatile=True)
 
     def process_input(self, key):
         """Process keyboard input during gameplay"""
-        # If in penalty period, ignore input
-        if self.error_penalty > 0:
-            return False
-            
-        if key == pygame.K_f:
-            # Check if this would be an error
-            if len(self.current_sequence) < len(self.target_sequence) and self.target_sequence[len(self.current_sequence)] == "古":
-                self.current_sequence += "古"
-            else:
-                # Error - wrong key
-                self.error_flash = self.error_penalty_time  # Set error flash for entire penalty period
-                self.error_penalty = self.error_penalty_time  # Set penalty timer
-                # Keep the current sequence visible during the error period
-                # It will be reset when the penalty ends
-                
-                # Increase consumption speed as penalty - now +1.0 (doubling) per error
-                self.consumption_boost += 1.0  # Increase by 100%
-                
-                # Increment error count
-                self.error_count += 1
-                
-                # Check if max errors reached
-                if self.error_count >= self.max_errors:
-                    # Game over due to too many errors
-                    self.game_state = "game_over"
-                    self.game_running = False
-                    self.score = self.elapsed_time
-                
-                return True
-            
-            return True
-            
-        elif key == pygame.K_j:
-            # Check if this would be an error
-            if len(self.current_sequence) < len(self.target_sequence) and self.target_sequence[len(self.current_sequence)] == "米":
-                self.current_sequence += "米"
-            else:
-                # Error - wrong key
-                self.error_flash = self.error_penalty_time  # Set error flash for entire penalty period
-                self.error_penalty = self.error_penalty_time  # Set penalty timer
-                # Keep the current sequence visible during the error period
-                # It will be reset when the penalty ends
-                
-                # Increase consumption speed as penalty - now +1.0 (doubling) per error
-                self.consumption_boost += 1.0  # Increase by 100%
-                
-                # Increment error count
-                self.error_count += 1
-                
-                # Check if max errors reached
-                if self.error_count >= self.max_errors:
-                    # Game over due to too many errors
-                    self.game_state = "game_over"
-                    self.game_running = False
-                    self.score = self.elapsed_time
-                
-                return True
-            
-            # Check if the sequence matches the target
-            if self.current_sequence == self.target_sequence:
-                # Add to inventory
-                self.inventory.append((self.current_sequence, len(self.current_sequence)))
-                
-                # Remove the completed sequence from the full target string
-                self.full_target_string = self.full_target_string[len(self.target_sequence):]
-                
-                # Move to next target sequence
-                self.current_target_index += 1
-                
-                # Check if we need to add more sequences to maintain 20 characters
-                while len(self.full_target_string) < 20:
-                    self.add_new_sequence()
-                
-                # Set the next target sequence
-                if self.current_target_index < len(self.target_sequences):
-                    self.target_sequence = self.target_sequences[self.current_target_index]
-                else:
-                    # This shouldn't happen with the while loop above, but just in case
-                    self.add_new_sequence()
-                    self.target_sequence = self.target_sequences[self.current_target_index]
-                
-                # Reset current sequence
-                self.current_sequence = ""
-            
-            return True
-        
-        return False
+        core_key = KEY_MAP.get(key)
+        if self.telemetry is None or core_key is None:
+            return self.core.process_input(core_key)
+        
+        # Compare the state around the keystroke to see what it did
+        core = self.core
+        position, length = len(core.current_sequence), len(core.target_sequence)
+        errors, completed = core.error_count, core.current_target_index
+        handled = core.process_input(core_key)
+        wrong = core.error_count != errors
+        self.telemetry.key_pressed(not wrong if handled else None)
+        if wrong:
+            self.telemetry.error(position, length)
+        elif core.current_target_index != completed:
+            self.telemetry.sequence_completed(length)
+        return handled
+
+    def record_run(self):
+        """Put a finished game on the leaderboard, once
+        
+        Called when the game over screen is drawn and also before the next
+        game starts or the window closes, so a game that ends and is left
+        in the same batch of events is still recorded.
+        """
+        if self.scores and self.core.game_state == "game_over" and self.score_rank is None:
+            # Queued for the background writer; the rank comes from memory
+            self.score_rank = self.scores.record(self.core.score, self.core.end_reason, self.core.seed)
+
+    def start_game(self):
+        """Start a game from the intro or game over screen"""
+        self.record_run()
+        self.score_rank = None
+        if self.telemetry:
+            self.telemetry.game_started()
+        self.core.start()
+
+    def is_idle(self):
+        """True while a screen that only changes on input is on the display"""
+        if self.player and not self.player.finished:
+            return False  # A replay moves on by itself
+        # Until the static screen has been shown (and the run recorded) the
+        # loop keeps going, so a game that just ended isn't left on screen
+        return self.core.game_state != "playing" and self.shown_screen is not None
+
+    def wait_events(self, timeout=IDLE_WAIT_MS):
+        """Block until an event arrives (or timeout ms pass), then return every pending one"""
+        event = pygame.event.wait(timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
 
     def run(self):
         """Main game loop"""
         running = True
         
         while running:
-            for event in pygame.event.get():
+            # The intro and game-over screens are drawn once and the loop sleeps
+            # until input arrives; those waits are not frames, so aren't profiled
+            idle = self.is_idle()
+            profiler = self.profiler if not idle else None
+            frame_start = time.perf_counter()
+            
+            if profiler:
+                profiler.begin_frame()
+            events = self.wait_events() if idle else pygame.event.get()
+            if profiler:
+                profiler.mark("events")
+            
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 
+                elif event.type in REDRAW_EVENTS:
+                    # The window contents were lost: push the whole screen again
+                    self.shown_screen = None
+                    self.invalidate_display()
+                
                 elif event.type == pygame.KEYDOWN:
-                    if self.game_state == "intro":
+                    if self.profiler:
+                        self.profiler.key_down()
+                        if event.key == pygame.K_F3:
+                            self.show_profiler = not self.show_profiler
+                    
+                    if self.player:
+                        # Keys only quit a replay
+                        if event.key == pygame.K_ESCAPE:
+                            running = False
+                    
+                    elif self.core.game_state == "intro":
                         if event.key == pygame.K_RETURN:
-                            self.game_state = "playing"
-                            self.game_running = True
-                            self.start_time = time.time()
-                            self.current_sequence = ""
-                            self.inventory.clear()
-                            self.consumption_boost = 1.0  # Reset consumption boost
-                            self.error_count = 0  # Reset error count
-                            self.error_flash = 0  # Reset error flash
-                            self.error_penalty = 0  # Reset error penalty
-                            self.generate_target_sequence()
-                            
-                            # Add an initial inventory item to prevent immediate game over
-                            self.inventory.append(("古米", 2))
+                            self.start_game()
                     
-                    elif self.game_state == "playing":
+                    elif self.core.game_state == "playing":
                         self.process_input(event.key)
                         
                         if event.key == pygame.K_ESCAPE:
-                            self.game_state = "game_over"
-                            self.game_running = False
-                            self.score = self.elapsed_time
+                            self.core.end("quit")
                     
-                    elif self.game_state == "game_over":
+                    elif self.core.game_state == "game_over":
                         if event.key == pygame.K_RETURN:
-                            self.game_state = "playing"
-                            self.game_running = True
-                            self.start_time = time.time()
-                            self.current_sequence = ""
-                            self.inventory.clear()
-                            self.consumption_boost = 1.0  # Reset consumption boost
-                            self.error_count = 0  # Reset error count
-                            self.error_flash = 0  # Reset error flash
-                            self.error_penalty = 0  # Reset error penalty
-                            self.generate_target_sequence()
-                            
-                            # Add an initial inventory item to prevent immediate game over
-                            self.inventory.append(("古米", 2))
+                            self.start_game()
                             
                         elif event.key == pygame.K_ESCAPE:
                             running = False
             
+            if profiler:
+                profiler.mark("input")
+            
+            if self.player:
+                self.alpha = self.player.update()
+            
             # Update game state
-            if self.game_state == "intro":
+            if self.core.game_state == "intro":
                 self.show_intro()
             
-            elif self.game_state == "playing":
-                # Update inventory consumption
-                inventory_changed = self.consume_inventory()
-                
-                # Check if game is over - immediately end if inventory is empty
-                if not self.inventory:
-                    self.game_state = "game_over"
-                    self.game_running = False
-                    self.score = self.elapsed_time
-                
-                # Check if we need to generate new sequences
-                if not self.full_target_string and self.current_target_index >= len(self.target_sequences):
-                    self.generate_target_sequence()
+            elif self.core.game_state == "playing":
+                # Catch the rules up with real time in fixed steps; rendering
+                # interpolates within the step that is still in progress
+                if not self.player:
+                    self.alpha = self.core.update()
+                if self.telemetry:
+                    self.telemetry.sample(len(self.core.inventory), self.core.consumption_boost)
+                if profiler:
+                    profiler.mark("update")
                 
                 # Update display
                 self.update_game_display()
             
-            elif self.game_state == "game_over":
+            elif self.core.game_state == "game_over":
+                self.record_run()
                 self.show_game_over()
             
-            # Control frame rate
+            if profiler:
+                profiler.mark("draw")
+            
+            # Feed the governor the frame's processing time; a new detail
+            # level needs one full redraw
+            if self.governor_enabled and not idle and self.core.game_state == "playing":
+                if self.governor.frame_done(time.perf_counter() - frame_start):
+                    self.invalidate_display()
+            
+            # Cap the render rate (game speed no longer depends on it)
             self.clock.tick(60)
+            if profiler:
+                profiler.mark("idle")
+                profiler.end_frame()
+        
+        if self.profiler and self.profile_out:
+            self.profiler.export(self.profile_out, {"governor": self.governor.stats(),
+                                                    "text_cache": self.text_cache.stats()})
+        if self.recorder:
+            self.recorder.close()
+        if self.player:
+            self.player.records.close()
+            self.replay_reader.close()
+        if self.scores:
+            self.record_run()
+            self.scores.close()
+        if self.telemetry:
+            self.telemetry.close()
         
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = OldRiceGame()
+    parser = argparse.ArgumentParser(description="古米マーケット (Old Rice Market)")
+    parser.add_argument("--render-mode", choices=["dirty", "full"], default="dirty",
+                        help="dirty: update only changed regions, full: redraw the whole frame")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto",
+                        help="renderer: SDL renderer with cached textures, surface: software blits, "
+                             "auto: renderer when available")
+    parser.add_argument("--software-renderer", action="store_true",
+                        help="use SDL's software renderer with the renderer backend (no GPU needed)")
+    parser.add_argument("--no-governor", action="store_true",
+                        help="always draw full detail, even when frames run over budget")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the target sequence generator")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each frame phase and show the overlay (F3 toggles it)")
+    parser.add_argument("--profile-out", metavar="PATH", default=None,
+                        help="write the profiler samples to PATH as JSON on exit (implies --profile)")
+    parser.add_argument("--record", metavar="PATH", default=None,
+                        help="record the session to a binary replay log")
+    parser.add_argument("--replay", metavar="PATH", default=None,
+                        help="play a replay log back in real time (see old_rice_game_replay.py for max speed)")
+    parser.add_argument("--font-cache", metavar="PATH", default=None,
+                        help="font lookup cache file (default: ~/.cache/old_rice_game/font_cache.json)")
+    parser.add_argument("--startup-report", metavar="PATH", default=None,
+                        help="write startup timings to PATH as JSON")
+    parser.add_argument("--scores", metavar="PATH", default=None,
+                        help="leaderboard database (default: ~/.local/share/old_rice_game/scores.db)")
+    parser.add_argument("--no-scores", action="store_true", help="don't record runs on the leaderboard")
+    parser.add_argument("--telemetry", metavar="DIR", nargs="?", const=True, default=None,
+                        help="export gameplay telemetry to DIR (default: ~/.local/share/old_rice_game/telemetry)")
+    args = parser.parse_args()
+    
+    game = OldRiceGame(render_mode=args.render_mode, seed=args.seed,
+                       profile=args.profile, profile_out=args.profile_out,
+                       record=args.record, replay=args.replay, font_cache=args.font_cache,
+                       scores=args.scores, keep_scores=not args.no_scores, telemetry=args.telemetry,
+                       backend=args.backend, software_renderer=args.software_renderer,
+                       governor=not args.no_governor)
+    if args.startup_report:
+        game.write_startup_report(args.startup_report)
     game.run()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Replay recording and playback for 古米マーケット (Old Rice Market)
+
+A replay log is a small header (seed and GameCore config) followed by
+fixed-size records, each tagged with the simulation step it happened at:
+
+    START      a game was started
+    KEY        a KEY_OLD / KEY_RICE keystroke reached process_input
+    GAME_OVER  the game ended (the step gives the score, arg the reason)
+
+Records are appended as they happen, so a log can be read while it is
+written (a trailing partial record is ignored). Since the rules run on a
+fixed timestep, applying each key before the same step reproduces the game
+exactly. ReplayReader memory-maps the log; ReplayPlayer runs it back either
+as fast as possible or paced by a real clock.
+
+Run as a script to play logs back headlessly and check their outcomes:
+
+    python old_rice_game_replay.py session1.orr session2.orr ...
+"""
+import argparse
+import mmap
+import struct
+import sys
+import time
+
+from old_rice_game_core import GameCore, KEY_OLD, KEY_RICE, END_REASONS, STEP_TIME
+
+# File header: magic, version, seed, step time, consumption_constant,
+# error_penalty_time, max_errors
+REPLAY_MAGIC = b"ORRP"
+REPLAY_VERSION = 2  # 2: consumption back at the original 0.96 units/s
+HEADER = struct.Struct("<4sHqdddI")
+
+# Record: step, kind, arg
+RECORD = struct.Struct("<IBB")
+RECORD_START = 0
+RECORD_KEY = 1  # arg: index in REPLAY_KEYS
+RECORD_GAME_OVER = 2  # arg: index in END_REASONS
+
+REPLAY_KEYS = (KEY_OLD, KEY_RICE)
+
+
+class ReplayError(Exception):
+    """Raised for logs that cannot be played back"""
+
+
+class ReplayWriter:
+    """Streams a session's records to a binary log
+
+    Pass it to GameCore as `recorder`; the core reports starts, keys and
+    game overs to it.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "wb")
+
+    def write_header(self, core):
+        """Write the seed and config of the core being recorded"""
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, core.seed, STEP_TIME,
+                                    core.consumption_constant, core.error_penalty_time, core.max_errors))
+
+    def game_started(self):
+        self.file.write(RECORD.pack(0, RECORD_START, 0))
+
+    def key_pressed(self, step, key):
+        self.file.write(RECORD.pack(step, RECORD_KEY, REPLAY_KEYS.index(key)))
+
+    def game_ended(self, step, reason):
+        self.file.write(RECORD.pack(step, RECORD_GAME_OVER, END_REASONS.index(reason)))
+        # Make each finished game durable without flushing on every key
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def record_session(core, path):
+    """Attach a ReplayWriter for `path` to `core` and return it"""
+    writer = ReplayWriter(path)
+    writer.write_header(core)
+    core.recorder = writer
+    return writer
+
+
+class ReplayReader:
+    """Memory-mapped view of a replay log"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            try:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise ReplayError(f"{path}: empty replay log") from None
+
+        if len(self.map) < HEADER.size:
+            raise ReplayError(f"{path}: truncated header")
+        magic, version, self.seed, step_time, self.consumption_constant, \
+            self.error_penalty_time, self.max_errors = HEADER.unpack_from(self.map)
+        if magic != REPLAY_MAGIC:
+            raise ReplayError(f"{path}: not a replay log")
+        if version != REPLAY_VERSION:
+            raise ReplayError(f"{path}: unsupported replay version {version}")
+        if step_time != STEP_TIME:
+            raise ReplayError(f"{path}: recorded with a step time of {step_time}s")
+
+    def __iter__(self):
+        """Yield (step, kind, arg) records"""
+        end = len(self.map) - (len(self.map) - HEADER.size) % RECORD.size
+        body = memoryview(self.map)[HEADER.size:end]
+        try:
+            yield from RECORD.iter_unpack(body)
+        finally:
+            body.release()
+
+    def new_core(self):
+        """A GameCore with the recorded seed and config"""
+        return GameCore(seed=self.seed, consumption_constant=self.consumption_constant,
+                        error_penalty_time=self.error_penalty_time, max_errors=self.max_errors)
+
+    def close(self):
+        self.map.close()
+
+
+class ReplayPlayer:
+    """Runs a replay log through a fresh GameCore
+
+    results gets one (recorded, replayed) pair of (score, end_reason) per
+    finished game; mismatches lists the games whose outcome differed.
+    """
+
+    def __init__(self, reader, clock=time.monotonic):
+        self.core = reader.new_core()
+        self.clock = clock
+        self.records = iter(reader)  # Generator over the reader's map
+        self.pending = next(self.records, None)
+        self.started_at = 0.0  # Clock reading when the current game started
+        self.results = []
+        self.mismatches = []
+
+    @property
+    def finished(self):
+        """True once every record has been applied"""
+        return self.pending is None
+
+    def run(self, until_step=None):
+        """Apply records and steps, pausing when the game reaches `until_step`"""
+        core = self.core
+        while self.pending is not None:
+            step, kind, arg = self.pending
+            if kind == RECORD_START:
+                core.start()
+                self.started_at = self.clock()
+                if until_step is not None:
+                    until_step = 0  # No time has passed in the new game yet
+            else:
+                # Catch the simulation up to the step the record happened at
+                while core.game_state == "playing" and core.step_count < step:
+                    if until_step is not None and core.step_count >= until_step:
+                        return
+                    core.step()
+
+                if kind == RECORD_KEY:
+                    if core.game_state == "playing":
+                        core.process_input(REPLAY_KEYS[arg])
+                elif kind == RECORD_GAME_OVER:
+                    if core.game_state == "playing" and END_REASONS[arg] == "quit":
+                        core.end("quit")
+                    self.check_outcome(step, END_REASONS[arg])
+                else:
+                    raise ReplayError(f"unknown record kind {kind}")
+            self.pending = next(self.records, None)
+
+    def update(self):
+        """Play back in real time; returns the interpolation fraction"""
+        elapsed_steps = (self.clock() - self.started_at) / STEP_TIME
+        self.run(until_step=int(elapsed_steps))
+        return elapsed_steps % 1.0 if self.core.game_state == "playing" else 0.0
+
+    def check_outcome(self, step, reason):
+        """Compare the replayed game over with the recorded one"""
+        core = self.core
+        recorded = (step * STEP_TIME, reason)
+        replayed = (core.score, core.end_reason) if core.game_state == "game_over" else (None, None)
+        self.results.append((recorded, replayed))
+        if core.game_state != "game_over" or core.step_count != step or core.end_reason != reason:
+            self.mismatches.append(len(self.results) - 1)
+
+
+def play(path):
+    """Play a log back as fast as possible; returns the finished ReplayPlayer"""
+    reader = ReplayReader(path)
+    player = ReplayPlayer(reader)
+    try:
+        player.run()
+    finally:
+        # The record iterator holds a view of the map until it is closed
+        player.records.close()
+        reader.close()
+    return player
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back 古米マーケット replay logs headlessly")
+    parser.add_argument("logs", nargs="+", help="replay logs to check")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    games = 0
+    start = time.perf_counter()
+    for path in args.logs:
+        try:
+            player = play(path)
+        except ReplayError as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        games += len(player.results)
+        for index in player.mismatches:
+            recorded, replayed = player.results[index]
+            print(f"{path}: game {index + 1}: recorded {recorded}, replayed {replayed}")
+        if player.mismatches:
+            failed += 1
+    elapsed = time.perf_counter() - start
+    print(f"{len(args.logs)} logs, {games} games, {failed} failed in {elapsed:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Persistent leaderboard for 古米マーケット (Old Rice Market)
+
+Runs are stored in SQLite (WAL mode). record() never touches the database
+on the calling thread: runs are queued and a background writer inserts
+them in batches, one transaction per batch.
+
+Rank and percentile queries never scan the runs either. Next to the runs
+the database keeps a table of counts per 0.1 s score bucket, loaded at
+startup into a Fenwick tree, plus a cached top-N list; both are updated in
+memory as runs are recorded, so a game-over screen can show the rank of a
+run immediately, however many runs are stored.
+
+Retention (maximum age, maximum number of runs) is applied by compact(),
+which also rebuilds the bucket counts and checkpoints the WAL.
+
+    python old_rice_game_scores.py top
+    python old_rice_game_scores.py compact --keep-days 90
+"""
+import argparse
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from bisect import insort
+
+# Scores are grouped into buckets of this many seconds for rank queries
+BUCKET_SECONDS = 0.1
+
+# Runs kept in the cached top list
+TOP_N = 10
+
+# Seconds the writer waits to gather a batch
+FLUSH_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    score REAL NOT NULL,
+    end_reason TEXT,
+    seed INTEGER,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_recorded_at ON runs (recorded_at);
+CREATE TABLE IF NOT EXISTS score_buckets (
+    bucket INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+
+def default_path():
+    """Per-user location of the score database"""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data_home, "old_rice_game", "scores.db")
+
+
+def bucket_of(score):
+    """Score bucket of a run (BUCKET_SECONDS wide)"""
+    return int(score / BUCKET_SECONDS + 1e-9)
+
+
+def connect(path):
+    """Open the database in WAL mode with the schema in place"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class BucketCounts:
+    """Fenwick tree of run counts per score bucket"""
+
+    def __init__(self, size=1024):
+        self.tree = [0] * (size + 1)
+        self.total = 0
+
+    def add(self, bucket, count=1):
+        while bucket + 1 >= len(self.tree):
+            self.grow()
+        i = bucket + 1
+        while i < len(self.tree):
+            self.tree[i] += count
+            i += i & -i
+        self.total += count
+
+    def grow(self):
+        """Double the capacity, rebuilding the tree from its bucket counts"""
+        counts = [self.at_or_below(bucket) - self.at_or_below(bucket - 1) for bucket in range(len(self.tree) - 1)]
+        self.tree = [0] * (2 * len(self.tree) - 1)
+        self.total = 0
+        for bucket, count in enumerate(counts):
+            if count:
+                self.add(bucket, count)
+
+    def at_or_below(self, bucket):
+        """Number of runs in buckets up to and including `bucket`"""
+        i = min(bucket + 1, len(self.tree) - 1)
+        count = 0
+        while i > 0:
+            count += self.tree[i]
+            i -= i & -i
+        return count
+
+
+class ScoreStore:
+    """SQLite-backed leaderboard with a background batch writer"""
+
+    def __init__(self, path=None, top_n=TOP_N, keep_days=None, keep_runs=None,
+                 flush_interval=FLUSH_INTERVAL):
+        self.path = path or default_path()
+        self.top_n = top_n
+        self.keep_days = keep_days
+        self.keep_runs = keep_runs
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()  # Guards the in-memory caches
+        self.pending = queue.Queue()
+        self.unwritten = []  # Recorded runs the writer has not committed yet, oldest first
+        self.write_errors = 0  # Batches lost to database errors
+        self.load_caches(connect(self.path))
+        self.writer = threading.Thread(target=self.write_loop, name="score-writer", daemon=True)
+        self.writer.start()
+
+    def load_caches(self, connection):
+        """Read the bucket counts and the top runs (closes the connection)
+
+        Runs still waiting for the writer are added on top of what is read.
+        """
+        try:
+            buckets = BucketCounts()
+            for bucket, count in connection.execute("SELECT bucket, count FROM score_buckets"):
+                buckets.add(bucket, count)
+            top = connection.execute("SELECT score, end_reason, recorded_at FROM runs "
+                                     "ORDER BY score DESC LIMIT ?", (self.top_n,)).fetchall()
+        finally:
+            connection.close()
+        with self.lock:
+            top_runs = [(-score, end_reason, recorded_at) for score, end_reason, recorded_at in top]
+            for score, end_reason, seed, recorded_at in self.unwritten:
+                buckets.add(bucket_of(score))
+                insort(top_runs, (-score, end_reason, recorded_at))
+            self.buckets = buckets
+            self.top_runs = top_runs[:self.top_n]
+
+    def record(self, score, end_reason=None, seed=None):
+        """Queue a run for writing and return its rank (1 = best)"""
+        run = (score, end_reason, seed, time.time())
+        with self.lock:
+            self.buckets.add(bucket_of(score))
+            insort(self.top_runs, (-score, end_reason, run[3]))
+            del self.top_runs[self.top_n:]
+            self.unwritten.append(run)
+        self.pending.put(("run", run))
+        return self.rank(score)
+
+    def rank(self, score):
+        """1 + the number of stored runs in a higher score bucket"""
+        with self.lock:
+            return self.buckets.total - self.buckets.at_or_below(bucket_of(score)) + 1
+
+    def percentile(self, score):
+        """Percentage of stored runs scoring at or below `score`"""
+        with self.lock:
+            if not self.buckets.total:
+                return 100.0
+            return 100.0 * self.buckets.at_or_below(bucket_of(score)) / self.buckets.total
+
+    @property
+    def total(self):
+        """Number of stored runs"""
+        return self.buckets.total
+
+    def top(self, n=None):
+        """The best runs as (score, end_reason, recorded_at), best first"""
+        with self.lock:
+            runs = self.top_runs[:n or self.top_n]
+        return [(-neg_score, end_reason, recorded_at) for neg_score, end_reason, recorded_at in runs]
+
+    def compact(self):
+        """Queue a retention pass and WAL checkpoint"""
+        self.pending.put(("compact", None))
+
+    def flush(self):
+        """Block until everything queued so far is written"""
+        done = threading.Event()
+        self.pending.put(("flush", done))
+        done.wait()
+
+    def close(self):
+        """Write the remaining runs and stop the writer"""
+        self.pending.put(("close", None))
+        self.writer.join()
+
+    def write_loop(self):
+        """Writer thread: batch queued runs into single transactions
+
+        A database error (locked, disk full) costs the batch it happened in,
+        counted in write_errors; the writer keeps going and flush() callers
+        are always released.
+        """
+        connection = None
+        try:
+            while True:
+                batch = [self.pending.get()]
+                deadline = time.monotonic() + self.flush_interval
+                while batch[-1][0] == "run":
+                    # Gather more runs for the same transaction
+                    try:
+                        batch.append(self.pending.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+
+                runs = [payload for kind, payload in batch if kind == "run"]
+                kind, payload = batch[-1]
+                try:
+                    if connection is None:
+                        connection = connect(self.path)
+                    if runs:
+                        self.write_runs(connection, runs)
+                    if kind == "compact":
+                        self.apply_retention(connection)
+                except (OSError, sqlite3.Error):
+                    self.write_errors += 1
+                finally:
+                    if kind == "flush":
+                        payload.set()
+                if kind == "close":
+                    return
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def write_runs(self, connection, runs):
+        try:
+            with connection:
+                connection.executemany("INSERT INTO runs (score, end_reason, seed, recorded_at) "
+                                       "VALUES (?, ?, ?, ?)", runs)
+                connection.executemany("INSERT INTO score_buckets (bucket, count) VALUES (?, 1) "
+                                       "ON CONFLICT (bucket) DO UPDATE SET count = count + 1",
+                                       [(bucket_of(run[0]),) for run in runs])
+        finally:
+            # Written or lost (the transaction was rolled back), they are no
+            # longer waiting; lost runs stay counted in memory until a reload
+            with self.lock:
+                del self.unwritten[:len(runs)]
+
+    def apply_retention(self, connection):
+        """Delete runs outside the retention policy and rebuild the bucket counts"""
+        with connection:
+            if self.keep_days is not None:
+                connection.execute("DELETE FROM runs WHERE recorded_at < ?",
+                                   (time.time() - self.keep_days * 86400,))
+            if self.keep_runs is not None:
+                connection.execute("DELETE FROM runs WHERE id NOT IN "
+                                   "(SELECT id FROM runs ORDER BY recorded_at DESC LIMIT ?)", (self.keep_runs,))
+            connection.execute("DELETE FROM score_buckets")
+            connection.execute("INSERT INTO score_buckets (bucket, count) "
+                               "SELECT CAST(score / ? + 1e-9 AS INTEGER), COUNT(*) FROM runs GROUP BY 1",
+                               (BUCKET_SECONDS,))
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.load_caches(connect(self.path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="古米マーケット leaderboard")
+    parser.add_argument("--db", default=None, help=f"score database (default: {default_path()})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    top = commands.add_parser("top", help="show the best runs")
+    top.add_argument("-n", type=int, default=TOP_N)
+    compact = commands.add_parser("compact", help="apply retention and checkpoint the WAL")
+    compact.add_argument("--keep-days", type=float, default=None)
+    compact.add_argument("--keep-runs", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "top":
+        store = ScoreStore(args.db, top_n=args.n)
+        for place, (score, end_reason, recorded_at) in enumerate(store.top(), 1):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(recorded_at))
+            print(f"{place:3d}. {score:7.1f}s  {end_reason or '-':8s}  {when}")
+        print(f"{store.total} runs")
+    else:
+        store = ScoreStore(args.db, keep_days=args.keep_days, keep_runs=args.keep_runs)
+        store.compact()
+        store.flush()
+        print(f"{store.total} runs kept")
+    store.close()
+    if store.write_errors:
+        print(f"{store.write_errors} database errors (database locked or disk full?)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""asyncio game server for 古米マーケット (Old Rice Market)
+
+One process hosts many independent sessions, each with its own GameCore.
+A single tick task advances every running game by fixed STEP_TIME steps
+(with the same catch-up cap as GameCore.update), so thousands of sessions
+share one timer instead of running a loop each.
+
+The protocol is newline-delimited JSON over TCP. Clients send:
+
+    {"type": "start"}                       start or restart a game
+    {"type": "key", "key": "f", "id": 7}    a KEY_OLD / KEY_RICE keystroke
+    {"type": "quit"}                        end the current game
+
+and receive {"type": "state", ...} messages holding only the fields that
+changed since the previous one (the first message has them all). State is
+pushed right after every client message (with "ack" set to the key's id)
+and otherwise every SEND_INTERVAL ticks while a game is running.
+
+    python old_rice_game_server.py serve --port 8765
+    python old_rice_game_server.py load --clients 2000 --duration 30
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from old_rice_game_core import GameCore, KEY_OLD, KEY_RICE, MAX_STEPS_PER_UPDATE, STEP_TIME, expected_key
+from old_rice_game_profiler import distribution
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Ticks between unsolicited state pushes while a game runs (10 per second)
+SEND_INTERVAL = 6
+
+# Clients with more unsent output than this are disconnected
+MAX_WRITE_BUFFER = 256 * 1024
+
+# Longest accepted client message
+MAX_LINE = 1024
+
+
+def encode(message):
+    """One protocol line"""
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def snapshot(core):
+    """Client-visible state, rounded so it only changes when the display would"""
+    inventory = core.inventory
+    return {
+        "state": core.game_state,
+        "elapsed": round(core.elapsed_time, 1),
+        "target": core.full_target_string,
+        "current_target": core.target_sequence,
+        "input": core.current_sequence,
+        "completed": core.current_target_index,
+        "inventory": len(inventory),
+        "front_remaining": round(inventory[0][1], 1) if inventory else 0,
+        "stockout_in": round(core.time_until_stockout(), 1),
+        "boost": core.consumption_boost,
+        "errors": core.error_count,
+        "penalty": round(core.error_penalty, 1),
+        "score": round(core.score, 2),
+        "end_reason": core.end_reason,
+    }
+
+
+class Session:
+    """One client connection and its game"""
+
+    def __init__(self, writer, seed=None):
+        self.writer = writer
+        self.core = GameCore(seed=seed)
+        self.sent = {}  # State fields as last sent to the client
+
+    def send(self, message):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            # The client stopped reading; don't buffer for it forever
+            transport.abort()
+            return
+        self.writer.write(encode(message))
+
+    def push_state(self, ack=None):
+        """Send the fields that changed since the last push"""
+        current = snapshot(self.core)
+        diff = {key: value for key, value in current.items() if self.sent.get(key) != value}
+        if not diff and ack is None:
+            return
+        self.sent.update(diff)
+        message = {"type": "state", **diff}
+        if ack is not None:
+            message["ack"] = ack
+        self.send(message)
+
+
+class GameServer:
+    """Hosts sessions and drives them from one shared tick scheduler"""
+
+    def __init__(self, send_interval=SEND_INTERVAL, max_steps_per_tick=MAX_STEPS_PER_UPDATE):
+        self.send_interval = send_interval
+        self.max_steps_per_tick = max_steps_per_tick
+        self.sessions = set()
+        self.playing = set()  # Sessions whose game is running (the only ones ticked)
+        self.ticks = 0
+        self.dropped_time = 0.0  # Time discarded by the catch-up cap
+        self.messages = 0
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection until it closes"""
+        session = Session(writer)
+        self.sessions.add(session)
+        try:
+            session.push_state()
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):  # Line too long or reset
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    session.send({"type": "error", "error": "invalid JSON"})
+                    continue
+                self.handle_message(session, message)
+        finally:
+            self.sessions.discard(session)
+            self.playing.discard(session)
+            writer.close()
+
+    def handle_message(self, session, message):
+        """Apply one client message to its session"""
+        self.messages += 1
+        core = session.core
+        kind = message.get("type") if isinstance(message, dict) else None
+        ack = None
+        if kind == "start":
+            core.start()
+            self.playing.add(session)
+        elif kind == "key":
+            ack = message.get("id", 0)
+            if core.game_state == "playing" and message.get("key") in (KEY_OLD, KEY_RICE):
+                core.process_input(message["key"])
+        elif kind == "quit":
+            if core.game_state == "playing":
+                core.end("quit")
+        else:
+            session.send({"type": "error", "error": f"unknown message type {kind!r}"})
+            return
+
+        if core.game_state != "playing":
+            self.playing.discard(session)
+        session.push_state(ack)
+
+    def step_all(self):
+        """Advance every running game by one fixed step"""
+        self.ticks += 1
+        push = self.ticks % self.send_interval == 0
+        finished = []
+        for session in self.playing:
+            session.core.step()
+            if session.core.game_state != "playing":
+                finished.append(session)
+                session.push_state()
+            elif push:
+                session.push_state()
+        for session in finished:
+            self.playing.discard(session)
+
+    async def tick_loop(self):
+        """Run step_all on a fixed timestep, catching up after slow ticks"""
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        accumulator = 0.0
+        while True:
+            await asyncio.sleep(max(0.0, STEP_TIME - accumulator))
+            now = loop.time()
+            accumulator += now - last
+            last = now
+
+            steps = 0
+            while accumulator >= STEP_TIME:
+                if steps == self.max_steps_per_tick:
+                    # Overloaded: drop the backlog rather than fall further behind
+                    self.dropped_time += accumulator
+                    accumulator = 0.0
+                    break
+                self.step_all()
+                accumulator -= STEP_TIME
+                steps += 1
+
+    async def report_loop(self, interval):
+        """Print a stats line every `interval` seconds"""
+        while True:
+            await asyncio.sleep(interval)
+            print(json.dumps({"sessions": len(self.sessions), "playing": len(self.playing),
+                              "ticks": self.ticks, "messages": self.messages,
+                              "dropped_time": round(self.dropped_time, 3)}), flush=True)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, stats_interval=None):
+        """Accept clients and tick their games until cancelled"""
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        tasks = [asyncio.create_task(self.tick_loop())]
+        if stats_interval:
+            tasks.append(asyncio.create_task(self.report_loop(stats_interval)))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class LoadStats:
+    """Counters shared by every load-generator client"""
+
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.keys = 0
+        self.messages = 0
+        self.bytes = 0
+        self.games = 0
+        self.latencies = []  # Key sent to its ack received (seconds)
+
+
+async def load_client(host, port, stats, deadline, key_interval, error_rate, rng):
+    """One bot: start games and type the expected keys until the deadline"""
+    try:
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    except OSError:
+        stats.failed += 1
+        return
+    stats.connected += 1
+    state = {}
+    outstanding = {}  # Key id -> time sent
+
+    async def read_states():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            stats.messages += 1
+            stats.bytes += len(line)
+            message = json.loads(line)
+            if "ack" in message:
+                sent = outstanding.pop(message["ack"], None)
+                if sent is not None:
+                    stats.latencies.append(time.perf_counter() - sent)
+            if message.get("state") == "game_over":
+                stats.games += 1
+            state.update(message)
+
+    reading = asyncio.create_task(read_states())
+    key_id = 0
+    try:
+        writer.write(encode({"type": "start"}))
+        while time.monotonic() < deadline and not reading.done():
+            await asyncio.sleep(key_interval)
+            if state.get("state") == "game_over":
+                writer.write(encode({"type": "start"}))
+                state["state"] = "starting"
+                continue
+            if state.get("state") != "playing" or outstanding:
+                continue  # Wait for the previous key to be acknowledged
+
+            key = expected_key(state.get("current_target", ""), state.get("input", ""))
+            if rng.random() < error_rate:
+                key = KEY_RICE if key == KEY_OLD else KEY_OLD
+            key_id += 1
+            outstanding[key_id] = time.perf_counter()
+            writer.write(encode({"type": "key", "key": key, "id": key_id}))
+            stats.keys += 1
+    finally:
+        reading.cancel()
+        writer.close()
+
+
+async def run_load(host, port, clients, duration, key_rate, error_rate, seed):
+    """Run `clients` bots for `duration` seconds and return a report"""
+    stats = LoadStats()
+    rng = random.Random(seed)
+    deadline = time.monotonic() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(load_client(host, port, stats, deadline, 1 / key_rate, error_rate,
+                                       random.Random(rng.random()))
+                           for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "connected": stats.connected,
+        "failed": stats.failed,
+        "seconds": elapsed,
+        "keys": stats.keys,
+        "keys_per_second": stats.keys / elapsed,
+        "messages": stats.messages,
+        "bytes": stats.bytes,
+        "games_finished": stats.games,
+        "ack_latency_ms": distribution(stats.latencies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="古米マーケット multi-session server")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="host game sessions")
+    serve.add_argument("--host", default=DEFAULT_HOST)
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--stats-interval", type=float, default=None, metavar="SECONDS",
+                       help="print server stats as JSON every SECONDS")
+
+    load = commands.add_parser("load", help="headless load generator")
+    load.add_argument("--host", default=DEFAULT_HOST)
+    load.add_argument("--port", type=int, default=DEFAULT_PORT)
+    load.add_argument("--clients", type=int, default=100)
+    load.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    load.add_argument("--key-rate", type=float, default=5.0, help="keystrokes per second per client")
+    load.add_argument("--error-rate", type=float, default=0.01, help="chance a keystroke is wrong")
+    load.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(GameServer().serve(args.host, args.port, args.stats_interval))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    report = asyncio.run(run_load(args.host, args.port, args.clients, args.duration,
+                                  args.key_rate, args.error_rate, args.seed))
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
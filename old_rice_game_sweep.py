@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Parameter sweep runner for 古米マーケット (Old Rice Market)
+
+Plays simulated games headlessly over a grid of rule parameters
+(consumption_constant, error_penalty_time, max_errors, error_boost) and
+bot typists (keystroke rate, error probability). Configurations run in
+parallel on a process pool, one task each, so throughput scales with the
+number of cores.
+
+Results stream to a JSON Lines file, one line per finished configuration,
+written as it completes. Each line holds the parameters, summary statistics
+and the per-game columns (survival time, end reason, keystrokes). Rerunning
+with the same output file skips the configurations already in it.
+
+    python old_rice_game_sweep.py --consumption-constant 0.3,0.5,0.7 \\
+        --key-rate 2,4,6 --error-prob 0.01,0.05 --games 200 --out sweep.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from old_rice_game_core import GameCore, KEY_OLD, KEY_RICE, STEP_TIME
+
+# Sweep axes: rule parameters first, then the bot typist
+PARAMETERS = ("consumption_constant", "error_penalty_time", "max_errors", "error_boost",
+              "key_rate", "error_prob")
+
+# Games still running after this many simulated seconds are stopped
+MAX_GAME_TIME = 600.0
+
+
+class BotTypist:
+    """Simulated player typing the expected keys
+
+    Keystrokes come at exponentially distributed intervals averaging
+    `key_rate` per second; each one is wrong with probability `error_prob`.
+    """
+
+    def __init__(self, key_rate, error_prob, rng):
+        self.key_rate = key_rate
+        self.error_prob = error_prob
+        self.rng = rng
+
+    def next_key(self, core):
+        """The key to press next"""
+        key = core.expected_key()
+        if self.rng.random() < self.error_prob:
+            key = KEY_RICE if key == KEY_OLD else KEY_OLD
+        return key
+
+    def play(self, core, max_time=MAX_GAME_TIME):
+        """Play one game; returns (survival seconds, end reason, keystrokes)"""
+        max_steps = int(max_time / STEP_TIME)
+        core.start()
+        keys = 0
+        while core.game_state == "playing":
+            wait = max(1, round(self.rng.expovariate(self.key_rate) / STEP_TIME))
+            core.run_frames(min(wait, max_steps - core.step_count))
+            if core.game_state != "playing":
+                break
+            if core.step_count >= max_steps:
+                core.end("quit")
+                return core.score, "timeout", keys
+            core.process_input(self.next_key(core))
+            keys += 1
+        return core.score, core.end_reason, keys
+
+
+def config_key(config):
+    """Stable identifier of a configuration, used to resume"""
+    return json.dumps([config[name] for name in PARAMETERS])
+
+
+def percentiles(values, fractions=(0.1, 0.5, 0.9)):
+    """Nearest-rank percentiles of the values"""
+    ordered = sorted(values)
+    return {f"p{round(f * 100)}": ordered[min(len(ordered) - 1, int(f * len(ordered)))] for f in fractions}
+
+
+def run_config(config, games, seed):
+    """Play `games` games of one configuration (runs in a worker process)"""
+    rng = random.Random(seed ^ zlib.crc32(config_key(config).encode()))
+    bot = BotTypist(config["key_rate"], config["error_prob"], rng)
+    core = GameCore(seed=rng.randrange(2 ** 63),
+                    consumption_constant=config["consumption_constant"],
+                    error_penalty_time=config["error_penalty_time"],
+                    max_errors=config["max_errors"],
+                    error_boost=config["error_boost"])
+
+    survival, reasons, keystrokes = [], [], []
+    for _ in range(games):
+        score, reason, keys = bot.play(core)
+        survival.append(score)
+        reasons.append(reason)
+        keystrokes.append(keys)
+
+    total_time = sum(survival)
+    reason_mix = {}
+    for reason in reasons:
+        reason_mix[reason] = reason_mix.get(reason, 0) + 1
+    return {
+        "key": config_key(config),
+        "params": config,
+        "games": games,
+        "survival": {"mean": total_time / games, **percentiles(survival)},
+        "end_reasons": reason_mix,
+        "keys_per_second": sum(keystrokes) / total_time if total_time else 0.0,
+        "columns": {"survival": survival, "end_reason": reasons, "keystrokes": keystrokes},
+    }
+
+
+def completed_keys(path):
+    """Configuration keys already present in an output file"""
+    keys = set()
+    if not os.path.exists(path):
+        return keys
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                keys.add(json.loads(line)["key"])
+            except (ValueError, KeyError):
+                continue  # A line cut short by an interrupted run
+    return keys
+
+
+def ends_with_newline(path):
+    """True if the (non-empty) file's last byte is a newline"""
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def grid(axes):
+    """Every combination of the axis values, as config dicts"""
+    for values in itertools.product(*(axes[name] for name in PARAMETERS)):
+        yield dict(zip(PARAMETERS, values))
+
+
+def sweep(axes, games, out, workers=None, seed=0):
+    """Run every configuration missing from `out`; returns how many ran"""
+    done = completed_keys(out)
+    pending = [config for config in grid(axes) if config_key(config) not in done]
+    if not pending:
+        return 0
+
+    with open(out, "a", encoding="utf-8") as f, ProcessPoolExecutor(max_workers=workers) as pool:
+        if f.tell() and not ends_with_newline(out):
+            f.write("\n")  # Don't append to a line cut short by an interrupted run
+        futures = [pool.submit(run_config, config, games, seed) for config in pending]
+        for finished, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+            f.flush()
+            print(f"[{finished}/{len(pending)}] {result['key']} "
+                  f"survival p50 {result['survival']['p50']:.1f}s", file=sys.stderr)
+    return len(pending)
+
+
+def number_list(kind):
+    """argparse type for a comma-separated list"""
+    def parse(text):
+        return [kind(value) for value in text.split(",")]
+    return parse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep 古米マーケット rule parameters with bot typists")
+    parser.add_argument("--consumption-constant", type=number_list(float), default=[0.5])
+    parser.add_argument("--error-penalty-time", type=number_list(float), default=[3.0])
+    parser.add_argument("--max-errors", type=number_list(int), default=[3])
+    parser.add_argument("--error-boost", type=number_list(float), default=[1.0],
+                        help="consumption boost added per error")
+    parser.add_argument("--key-rate", type=number_list(float), default=[4.0],
+                        help="bot keystrokes per second")
+    parser.add_argument("--error-prob", type=number_list(float), default=[0.02],
+                        help="chance a bot keystroke is wrong")
+    parser.add_argument("--games", type=int, default=100, help="games per configuration")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="sweep.jsonl", help="JSON Lines output (appended to, resumable)")
+    args = parser.parse_args(argv)
+
+    axes = {name: getattr(args, name) for name in PARAMETERS}
+    ran = sweep(axes, args.games, args.out, args.workers, args.seed)
+    print(f"{ran} configurations run, results in {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Per-session gameplay telemetry for 古米マーケット (Old Rice Market)
+
+The game captures four streams while a game runs:
+
+    keys        game, t, interval, result   every keystroke (result 1 correct,
+                                            0 error, -1 ignored during a penalty)
+    sequences   game, t, length, seconds    every completed target sequence
+    errors      game, t, position, length   where in target_sequence each error was
+    inventory   game, t, depth, boost       inventory depth and consumption_boost,
+                                            every SAMPLE_INTERVAL seconds
+
+t is seconds since the game started. Capture only writes numbers into
+preallocated array-backed ring buffers, with no locking or I/O on
+the game loop. A background exporter drains the buffers every
+FLUSH_INTERVAL seconds and appends each batch, compressed, to a rotating
+JSON Lines file (one gzip member per batch, one line per stream):
+
+    zcat ~/.local/share/old_rice_game/telemetry/*.jsonl.gz
+
+If the game outruns the exporter the oldest rows are overwritten; the
+number lost is reported in each batch instead of blocking the game.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+from array import array
+
+# Captured streams and their columns
+STREAMS = {
+    "keys": ("game", "t", "interval", "result"),
+    "sequences": ("game", "t", "length", "seconds"),
+    "errors": ("game", "t", "position", "length"),
+    "inventory": ("game", "t", "depth", "boost"),
+}
+
+# Columns exported as integers (everything is stored as a double)
+INTEGER_COLUMNS = {"game", "result", "length", "position", "depth"}
+
+# Rows kept per stream between exports
+RING_CAPACITY = 4096
+
+# Seconds between inventory samples
+SAMPLE_INTERVAL = 0.1
+
+# Seconds between exporter passes
+FLUSH_INTERVAL = 1.0
+
+# A telemetry file is rotated once it grows past this size
+MAX_FILE_BYTES = 1024 * 1024
+
+# Telemetry files kept in the directory (oldest are deleted)
+MAX_FILES = 20
+
+
+def default_directory():
+    """Per-user location of the telemetry files"""
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(data_home, "old_rice_game", "telemetry")
+
+
+class RingBuffer:
+    """Fixed-size table of float rows with one writer and one reader
+
+    The writer (the game loop) never waits: rows older than `capacity`
+    are overwritten. The reader copies out the rows written since its
+    last read and works out how many it lost to the writer.
+    """
+
+    def __init__(self, columns, capacity=RING_CAPACITY):
+        self.columns = columns
+        self.width = len(columns)
+        self.capacity = capacity
+        self.data = array("d", bytes(8 * self.width * capacity))
+        self.written = 0  # Rows appended so far (the next row's number)
+
+    def append(self, *values):
+        i = (self.written % self.capacity) * self.width
+        self.data[i:i + self.width] = array("d", values)
+        self.written += 1
+
+    def read_since(self, start):
+        """Rows appended since row number `start`
+
+        Returns (next start, flat list of values, rows lost).
+        """
+        end = self.written
+        first = max(start, end - self.capacity)
+        values = self.copy(first, end)
+        # A row may have been overwritten while copying (the one being written
+        # now reuses the slot of the row `capacity` before it)
+        safe = min(end, max(first, self.written - self.capacity + 1))
+        if safe > first:
+            values = values[(safe - first) * self.width:]
+        return end, values, safe - start
+
+    def copy(self, first, end):
+        count = end - first
+        if count <= 0:
+            return []
+        a = (first % self.capacity) * self.width
+        b = (end % self.capacity) * self.width
+        if a < b:
+            return self.data[a:b].tolist()
+        return self.data[a:].tolist() + self.data[:b].tolist()
+
+
+class SessionTelemetry:
+    """Captures a session's streams and exports them from a background thread"""
+
+    def __init__(self, directory=None, capacity=RING_CAPACITY, flush_interval=FLUSH_INTERVAL,
+                 max_file_bytes=MAX_FILE_BYTES, max_files=MAX_FILES, clock=time.perf_counter):
+        self.directory = directory or default_directory()
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self.clock = clock
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.buffers = {name: RingBuffer(columns, capacity) for name, columns in STREAMS.items()}
+        self.read_positions = dict.fromkeys(STREAMS, 0)  # Exporter only
+        self.lost = dict.fromkeys(STREAMS, 0)
+        self.export_errors = 0
+        self.file_index = 0
+
+        # Per-game capture state (game loop only)
+        self.game = 0
+        self.game_start = self.last_key = self.last_completion = self.next_sample = clock()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.stop = threading.Event()
+        self.exporter = threading.Thread(target=self.export_loop, name="telemetry-exporter", daemon=True)
+        self.exporter.start()
+
+    # Capture (game loop)
+
+    def game_started(self):
+        self.game += 1
+        self.game_start = self.last_key = self.last_completion = self.clock()
+        self.next_sample = self.game_start
+
+    def key_pressed(self, correct):
+        """A keystroke; correct is None when it was ignored (penalty period)"""
+        now = self.clock()
+        result = -1 if correct is None else int(correct)
+        self.buffers["keys"].append(self.game, now - self.game_start, now - self.last_key, result)
+        self.last_key = now
+
+    def sequence_completed(self, length):
+        now = self.clock()
+        self.buffers["sequences"].append(self.game, now - self.game_start, length, now - self.last_completion)
+        self.last_completion = now
+
+    def error(self, position, length):
+        """A wrong key at `position` in a target sequence of `length` characters"""
+        self.buffers["errors"].append(self.game, self.clock() - self.game_start, position, length)
+
+    def sample(self, depth, boost):
+        """Inventory sample, kept at most every SAMPLE_INTERVAL seconds"""
+        now = self.clock()
+        if now < self.next_sample:
+            return
+        self.next_sample = now + SAMPLE_INTERVAL
+        self.buffers["inventory"].append(self.game, now - self.game_start, depth, boost)
+
+    # Export (background thread)
+
+    def close(self):
+        """Stop the exporter after a final pass"""
+        self.stop.set()
+        self.exporter.join()
+
+    def export_loop(self):
+        while not self.stop.wait(self.flush_interval):
+            self.export()
+        self.export()
+
+    def export(self):
+        """Write everything captured since the previous pass as one batch"""
+        lines = []
+        for name, buffer in self.buffers.items():
+            start = self.read_positions[name]
+            self.read_positions[name], values, lost = buffer.read_since(start)
+            self.lost[name] += lost
+            if not values and not lost:
+                continue
+            width = buffer.width
+            columns = {}
+            for i, column in enumerate(buffer.columns):
+                column_values = values[i::width]
+                columns[column] = [int(v) for v in column_values] if column in INTEGER_COLUMNS else column_values
+            lines.append(json.dumps({"session": self.session, "stream": name, "lost": lost, "columns": columns},
+                                    separators=(",", ":")))
+        if not lines:
+            return
+        try:
+            path = self.current_path()
+            with gzip.open(path, "ab") as f:
+                f.write(("\n".join(lines) + "\n").encode("utf-8"))
+        except OSError:
+            self.export_errors += 1  # Telemetry is best effort; never take the game down
+
+    def current_path(self):
+        """File for the next batch, rotating when it got too big"""
+        path = os.path.join(self.directory, f"telemetry-{self.session}-{self.file_index:03d}.jsonl.gz")
+        if os.path.exists(path) and os.path.getsize(path) >= self.max_file_bytes:
+            self.file_index += 1
+            path = os.path.join(self.directory, f"telemetry-{self.session}-{self.file_index:03d}.jsonl.gz")
+            self.prune()
+        return path
+
+    def prune(self):
+        """Delete the oldest files beyond max_files"""
+        files = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                 if name.startswith("telemetry-") and name.endswith(".jsonl.gz")]
+        files.sort(key=os.path.getmtime)
+        for path in files[:max(0, len(files) - self.max_files + 1)]:
+            os.remove(path)